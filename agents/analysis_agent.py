@@ -1,41 +1,52 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
+from agents.portfolio_engine import PortfolioFrame
+from utils.tracing import tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AnalysisAgent:
+    @tracer.traced("analysis_agent.analyze")
+    def analyze(self, market_data: Dict[str, Any], weights: Dict[str, float],
+                earnings: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """Compute exposure, earnings surprises, sector weights and concentration in one vectorized pass."""
+        try:
+            summary = PortfolioFrame.from_dicts(market_data, weights, earnings).summary()
+            logger.info(f"Portfolio analysis for {len(weights)} positions: exposure {summary['exposure']:.2f}%, "
+                        f"HHI {summary['concentration']['hhi']:.3f}")
+            return summary
+        except Exception as e:
+            logger.error(f"Error analyzing portfolio: {str(e)}")
+            return {"exposure": 0.0, "earnings_surprise": {s: 0.0 for s in weights}, "sector_weights": {},
+                    "concentration": {"hhi": 0.0, "effective_positions": 0.0, "max_weight": 0.0}}
+
     def analyze_portfolio(self, market_data: Dict[str, Any], weights: Dict[str, float]) -> float:
         """Calculate portfolio exposure as a percentage of total AUM."""
         try:
-            total_aum = sum(weights.values())
-            if total_aum == 0:
+            frame = PortfolioFrame.from_dicts(market_data, weights)
+            if frame.total_aum == 0:
                 logger.warning("Total AUM is zero, cannot calculate exposure")
                 return 0.0
-
-            exposure_value = 0
-            for symbol, weight in weights.items():
-                price = market_data.get(symbol, {}).get("price", 0)
-                exposure_value += weight * price
-            exposure = (exposure_value / total_aum) * 100 if total_aum > 0 else 0
+            exposure = frame.exposure()
             logger.info(f"Portfolio exposure calculated: {exposure:.2f}%")
             return exposure
         except Exception as e:
             logger.error(f"Error calculating portfolio exposure: {str(e)}")
             return 0.0
 
-    def analyze_earnings(self, earnings: Dict[str, Dict[str, float]], symbol: str) -> float:
-        """Calculate earnings surprise percentage for a symbol."""
+    def analyze_earnings_many(self, earnings: Dict[str, Dict[str, float]], symbols: List[str]) -> Dict[str, float]:
+        """Calculate earnings surprise percentages for many symbols at once."""
         try:
-            earnings_data = earnings.get(symbol, {})
-            reported_eps = earnings_data.get("Reported EPS", 0)
-            estimated_eps = earnings_data.get("Estimated EPS", 0)
-            if estimated_eps == 0:
-                logger.warning(f"Estimated EPS for {symbol} is zero, cannot calculate surprise")
-                return 0.0
-            surprise = ((reported_eps - estimated_eps) / estimated_eps) * 100
-            logger.info(f"Earnings surprise for {symbol}: {surprise:.2f}% (Reported: {reported_eps}, Estimated: {estimated_eps})")
-            return surprise
+            frame = PortfolioFrame.from_dicts({}, {s: 0.0 for s in symbols}, earnings)
+            missing = int((frame.estimated_eps == 0).sum())
+            if missing:
+                logger.warning(f"Estimated EPS is zero for {missing} of {len(frame)} symbols, surprise set to 0")
+            return dict(zip(frame.symbols, frame.earnings_surprise().tolist()))
         except Exception as e:
-            logger.error(f"Error calculating earnings surprise for {symbol}: {str(e)}")
-            return 0.0
+            logger.error(f"Error calculating earnings surprises: {str(e)}")
+            return {s: 0.0 for s in symbols}
+
+    def analyze_earnings(self, earnings: Dict[str, Dict[str, float]], symbol: str) -> float:
+        """Calculate earnings surprise percentage for a symbol."""
+        return self.analyze_earnings_many(earnings, [symbol]).get(symbol, 0.0)
@@ -0,0 +1,142 @@
+from langchain.embeddings.base import Embeddings
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+import hashlib
+import logging
+import sqlite3
+import threading
+import numpy as np
+from utils.tracing import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache in front of an embeddings model.
+
+    Vectors are keyed by a hash of the model name, the embedding kind (document or query) and the
+    text. Lookups go through an in-memory LRU tier and then an optional sqlite tier on disk;
+    only texts missing from both are sent to the model, in a single batch. For symmetric models
+    (queries and documents embedded the same way, as with sentence-transformers) query batches
+    also go through one embed_documents call.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_entries: int = 20000,
+                 disk_path: Optional[str] = None, symmetric: bool = True):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.symmetric = symmetric
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if disk_path:
+            try:
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error opening embedding cache at {disk_path}: {str(e)}")
+                self._db = None
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while len(self._memory) > self.max_entries:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            missing = [key for key in keys if key not in found]
+            if missing and self._db is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _store(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()]
+                )
+                self._db.commit()
+
+    def _embed(self, kind: str, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        pending = {key: text for key, text in zip(keys, texts) if key not in found}
+        tracer.count("cache_requests_total", len(found), cache="embeddings", result="hit")
+        tracer.count("cache_requests_total", len(pending), cache="embeddings", result="miss")
+        if pending:
+            tracer.count("model_inputs_total", len(pending), model=self.model_name)
+            if kind == "query" and not self.symmetric:
+                vectors = [self.embeddings.embed_query(text) for text in pending.values()]
+            else:
+                vectors = self.embeddings.embed_documents(list(pending.values()))
+            computed = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(pending, vectors)}
+            self._store(computed)
+            found.update(computed)
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("document", texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all cache misses to the model in one batch."""
+        return self._embed("query", texts)
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the disk tier, if any, is kept) and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate and bytes held by each tier."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            disk_bytes = 0
+            if self._db is not None:
+                disk_bytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": disk_bytes,
+            }
@@ -1,32 +1,174 @@
-from transformers import pipeline
+from agents.model_registry import get_model
+from utils.cache import TTLCache
+from utils.tracing import tracer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 import logging
+import os
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _LoadedModel(NamedTuple):
+    tokenizer: Any
+    model: Any
+
 class LanguageAgent:
-    def __init__(self):
+    def __init__(self, model_name: str = "distilgpt2", quantize: Optional[bool] = None,
+                 num_threads: Optional[int] = None, cache_size: int = 256, batch_size: int = 8):
+        # The model is built on first use (or by warmup) and shared process-wide
+        self.model_name = model_name
+        # Dynamic int8 quantization of the linear layers trades a little quality for CPU speed
+        self.quantize = os.getenv("LANGUAGE_MODEL_QUANTIZE") == "1" if quantize is None else quantize
+        threads = num_threads or os.getenv("LANGUAGE_MODEL_THREADS")
+        self.num_threads = int(threads) if threads else None
+        self.batch_size = batch_size
+        # Generations keyed by prompt and generation parameters
+        self.cache = TTLCache(maxsize=cache_size, ttl=24 * 3600)
+        self.last_stats: Dict[str, Any] = {}
+        self._generator = None
+        self._load_failed = False
+
+    @property
+    def mode(self) -> str:
+        return "int8" if self.quantize else "fp32"
+
+    @property
+    def generator(self) -> Optional[_LoadedModel]:
+        if self._generator is None and not self._load_failed:
+            try:
+                self._generator = get_model(f"text-generation:{self.model_name}:{self.mode}", self._build_generator)
+            except Exception as e:
+                logger.error(f"Error initializing language model: {str(e)}")
+                self._load_failed = True
+        return self._generator
+
+    def _build_generator(self) -> _LoadedModel:
+        # Imported here so that importing the agent does not pull in torch
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        if self.num_threads:
+            # Process-wide setting: intra-op threads used by every CPU forward pass
+            torch.set_num_threads(self.num_threads)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        # GPT-2 has no pad token; pad on the left so every prompt ends where generation starts,
+        # and truncate on the left so the query at the end of the prompt survives
+        tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+        tokenizer.truncation_side = "left"
+        model = AutoModelForCausalLM.from_pretrained(self.model_name).eval()
+        if self.quantize:
+            model = self._quantize(model)
+        return _LoadedModel(tokenizer, model)
+
+    @staticmethod
+    def _quantize(model):
+        """Dynamically quantize linear layers to int8.
+
+        GPT-2 projections are transformers Conv1D modules (a transposed linear), which
+        quantize_dynamic does not recognize, so they are converted to nn.Linear first.
+        """
+        import torch
+        from transformers.pytorch_utils import Conv1D
+        for parent in list(model.modules()):
+            for name, child in list(parent.named_children()):
+                if isinstance(child, Conv1D):
+                    in_features, out_features = child.weight.shape
+                    linear = torch.nn.Linear(in_features, out_features)
+                    linear.weight.data = child.weight.data.t().contiguous()
+                    linear.bias.data = child.bias.data
+                    setattr(parent, name, linear)
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def warmup(self) -> bool:
+        """Load the model ahead of the first request; returns whether it is available."""
+        return self.generator is not None
+
+    @staticmethod
+    def build_prompt(context: str, query: str) -> str:
+        return f"Based on the following context: {context}\n\nAnswer the query: {query}"
+
+    def _generate_batch(self, prompts: List[str], max_new_tokens: int, do_sample: bool) -> Tuple[List[str], int]:
+        """Generate continuations for prompts in one padded forward pass; returns (texts, generated token count)."""
+        import torch
+        tokenizer, model = self.generator
+        max_input = model.config.n_positions - max_new_tokens
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=max_input)
+        with torch.inference_mode():
+            output = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=do_sample,
+                                    pad_token_id=tokenizer.eos_token_id)
+        new_tokens = output[:, inputs["input_ids"].shape[1]:]
+        # Rows that finish early are padded with eos; count each row up to and including its first eos
+        is_eos = new_tokens == tokenizer.eos_token_id
+        eos_seen = is_eos.int().cumsum(dim=1)
+        generated = int(((eos_seen == 0) | (is_eos & (eos_seen == 1))).sum())
+        texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        return texts, generated
+
+    @tracer.traced("language_agent.generate_narratives")
+    def generate_narratives(self, items: List[Tuple[str, str]], max_new_tokens: int = 100,
+                            do_sample: bool = True) -> List[str]:
+        """Generate one narrative per (context, query), batching prompts of similar length.
+
+        Sampling is on by default, as in distilgpt2's text-generation pipeline settings. Results are
+        cached by prompt and generation parameters, so a repeated prompt returns the same sample
+        until it is evicted; pass do_sample=False for deterministic greedy output.
+        Throughput for the call is kept in last_stats (tokens_per_second per mode).
+        """
+        if not items:
+            return []
+        if not self.generator:
+            return ["Unable to generate narrative due to model unavailability."] * len(items)
+        prompts = [self.build_prompt(context, query) for context, query in items]
+        keys = [(prompt, max_new_tokens, do_sample, self.mode) for prompt in prompts]
+        results: List[Optional[str]] = [self.cache.get(key) for key in keys]
+        cache_hits = sum(result is not None for result in results)
+        tracer.count("cache_requests_total", cache_hits, cache="narratives", result="hit")
+        tracer.count("cache_requests_total", len(prompts) - cache_hits, cache="narratives", result="miss")
+        # Repeated prompts within the call are generated once
+        pending = list(dict.fromkeys(prompts[i] for i, result in enumerate(results) if result is None))
+
+        generated_texts: Dict[str, str] = {}
+        generated_tokens = 0
+        batches = 0
+        start = time.perf_counter()
         try:
-            self.generator = pipeline("text-generation", model="distilgpt2")
+            # Sorting by length keeps padding (wasted compute) small within each batch
+            tokenizer = self.generator.tokenizer
+            pending.sort(key=lambda prompt: len(tokenizer.encode(prompt)))
+            for i in range(0, len(pending), self.batch_size):
+                batch = pending[i:i + self.batch_size]
+                texts, tokens = self._generate_batch(batch, max_new_tokens, do_sample)
+                generated_tokens += tokens
+                batches += 1
+                for prompt, text in zip(batch, texts):
+                    # Same shape as the text-generation pipeline: the prompt followed by the continuation
+                    generated_texts[prompt] = (prompt + text).strip()
         except Exception as e:
-            logger.error(f"Error initializing language model: {str(e)}")
-            self.generator = None
+            logger.error(f"Error generating narrative: {str(e)}")
+        elapsed = time.perf_counter() - start
 
+        for i, prompt in enumerate(prompts):
+            if results[i] is None:
+                results[i] = generated_texts.get(prompt, "Error generating response.")
+                if prompt in generated_texts:
+                    self.cache.set(keys[i], results[i])
+        self.last_stats = {
+            "mode": self.mode,
+            "threads": self.num_threads,
+            "prompts": len(prompts),
+            "cache_hits": cache_hits,
+            "batches": batches,
+            "generated_tokens": generated_tokens,
+            "seconds": elapsed,
+            "tokens_per_second": generated_tokens / elapsed if elapsed > 0 else 0.0,
+        }
+        if batches:
+            logger.info(f"Generated {generated_tokens} tokens in {batches} batches "
+                        f"({self.last_stats['tokens_per_second']:.1f} tokens/s, {self.mode})")
+        return results
+
+    @tracer.traced("language_agent.generate_narrative")
     def generate_narrative(self, context: str, query: str) -> str:
         """Generate a narrative response based on context and query."""
-        try:
-            if self.generator:
-                prompt = f"Based on the following context: {context}\n\nAnswer the query: {query}"
-                # Truncate input to avoid exceeding max_length
-                response = self.generator(
-                    prompt,
-                    max_new_tokens=100,  # Generate up to 100 new tokens
-                    truncation=True,
-                    pad_token_id=50256,
-                    num_return_sequences=1
-                )[0]["generated_text"]
-                return response.strip()
-            return "Unable to generate narrative due to model unavailability."
-        except Exception as e:
-            logger.error(f"Error generating narrative: {str(e)}")
-            return "Error generating response."
\ No newline at end of file
+        return self.generate_narratives([(context, query)])[0]
@@ -0,0 +1,49 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Process-wide registry so every agent (and every Orchestrator) shares one copy of each model
+_models: Dict[str, Any] = {}
+_load_seconds: Dict[str, float] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+def get_model(key: str, factory: Callable[[], Any]) -> Any:
+    """Return the model registered under key, building it with factory on first use."""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _models:
+            start = time.perf_counter()
+            _models[key] = factory()
+            _load_seconds[key] = time.perf_counter() - start
+            logger.info(f"Loaded model {key} in {_load_seconds[key]:.2f}s")
+        return _models[key]
+
+def loaded_models() -> Dict[str, float]:
+    """Map of loaded model keys to the seconds each took to build."""
+    return dict(_load_seconds)
+
+def clear() -> None:
+    """Drop all registered models (mainly for benchmarks)."""
+    with _registry_lock:
+        _models.clear()
+        _load_seconds.clear()
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, or 0.0 where unsupported."""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
@@ -0,0 +1,92 @@
+import logging
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PortfolioFrame:
+    """Portfolio positions held in aligned NumPy arrays, one element per symbol.
+
+    All analytics are computed for the whole book in single vectorized passes.
+    """
+
+    def __init__(self, symbols: Sequence[str], prices: np.ndarray, weights: np.ndarray,
+                 reported_eps: Optional[np.ndarray] = None, estimated_eps: Optional[np.ndarray] = None,
+                 sectors: Optional[Sequence[str]] = None):
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.reported_eps = np.zeros(n) if reported_eps is None else np.asarray(reported_eps, dtype=np.float64)
+        self.estimated_eps = np.zeros(n) if estimated_eps is None else np.asarray(estimated_eps, dtype=np.float64)
+        self.sectors = np.asarray(["Unknown"] * n if sectors is None else list(sectors), dtype=object)
+        for name in ("prices", "weights", "reported_eps", "estimated_eps", "sectors"):
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"{name} has {len(getattr(self, name))} entries, expected {n}")
+
+    @classmethod
+    def from_dicts(cls, market_data: Dict[str, Any], weights: Dict[str, float],
+                   earnings: Optional[Dict[str, Dict[str, float]]] = None) -> "PortfolioFrame":
+        """Build a frame for the symbols in weights from the dict shapes returned by APIAgent."""
+        earnings = earnings or {}
+        symbols = list(weights)
+        quotes = [market_data.get(s, {}) for s in symbols]
+        eps = [earnings.get(s, {}) for s in symbols]
+        return cls(
+            symbols,
+            prices=np.fromiter((q.get("price", 0) or 0 for q in quotes), dtype=np.float64, count=len(symbols)),
+            weights=np.fromiter(weights.values(), dtype=np.float64, count=len(symbols)),
+            reported_eps=np.fromiter((e.get("Reported EPS", 0) or 0 for e in eps), dtype=np.float64, count=len(symbols)),
+            estimated_eps=np.fromiter((e.get("Estimated EPS", 0) or 0 for e in eps), dtype=np.float64, count=len(symbols)),
+            sectors=[q.get("sector", "Unknown") for q in quotes],
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def total_aum(self) -> float:
+        return float(self.weights.sum())
+
+    def exposure(self) -> float:
+        """Price-weighted exposure as a percentage of total AUM (0 when AUM is zero)."""
+        total_aum = self.total_aum
+        if total_aum == 0:
+            return 0.0
+        return float(self.weights @ self.prices / total_aum * 100)
+
+    def earnings_surprise(self) -> np.ndarray:
+        """Earnings surprise percentage per symbol; 0 where the estimate is zero."""
+        surprise = np.zeros(len(self))
+        np.divide((self.reported_eps - self.estimated_eps) * 100, self.estimated_eps,
+                  out=surprise, where=self.estimated_eps != 0)
+        return surprise
+
+    def sector_weights(self) -> Dict[str, float]:
+        """Share of total AUM held in each sector."""
+        total_aum = self.total_aum
+        if total_aum == 0 or not len(self):
+            return {}
+        sectors, inverse = np.unique(self.sectors.astype(str), return_inverse=True)
+        totals = np.bincount(inverse, weights=self.weights)
+        return dict(zip(sectors.tolist(), (totals / total_aum).tolist()))
+
+    def concentration(self) -> Dict[str, float]:
+        """Herfindahl-Hirschman index of position weights, the effective number of positions and the largest weight."""
+        total_aum = self.total_aum
+        if total_aum == 0:
+            return {"hhi": 0.0, "effective_positions": 0.0, "max_weight": 0.0}
+        shares = self.weights / total_aum
+        hhi = float(shares @ shares)
+        return {"hhi": hhi, "effective_positions": 1 / hhi if hhi else 0.0, "max_weight": float(shares.max())}
+
+    def summary(self) -> Dict[str, Any]:
+        """All portfolio analytics in one call."""
+        surprise = self.earnings_surprise()
+        return {
+            "exposure": self.exposure(),
+            "earnings_surprise": dict(zip(self.symbols, surprise.tolist())),
+            "sector_weights": self.sector_weights(),
+            "concentration": self.concentration(),
+        }
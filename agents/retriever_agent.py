@@ -1,37 +1,234 @@
 from langchain.vectorstores import FAISS
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
+from agents.embedding_cache import CachedEmbeddings
+from agents.model_registry import get_model
+from utils.tracing import tracer
+import hashlib
+import json
 import logging
-from typing import List
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
 class RetrieverAgent:
-    def __init__(self):
+    def __init__(self, index_dir: Optional[str] = None, max_age_seconds: float = 24 * 3600):
+        # Index persists across queries; documents are keyed by content hash so repeats skip embedding
+        self.index_dir = index_dir or os.getenv("RETRIEVER_INDEX_DIR")
+        self.max_age_seconds = max_age_seconds
+        self.vector_store = None
+        self.indexed_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        # The embedding model and any saved index are loaded on first use (or by warmup)
+        self._embeddings = None
+        self._load_failed = False
+        self._index_pending = bool(self.index_dir)
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None and not self._load_failed:
+            try:
+                self._embeddings = get_model(f"embeddings:{EMBEDDING_MODEL}", self._build_embeddings)
+            except Exception as e:
+                logger.error(f"Error initializing retriever: {str(e)}")
+                self._load_failed = True
+        return self._embeddings
+
+    @staticmethod
+    def _build_embeddings() -> CachedEmbeddings:
+        return CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL),
+            model_name=EMBEDDING_MODEL,
+            disk_path=os.getenv("EMBEDDING_CACHE_PATH")
+        )
+
+    def _ensure_index_loaded(self) -> None:
+        if self._index_pending:
+            self._index_pending = False
+            self.load()
+
+    def warmup(self) -> bool:
+        """Load the embedding model and any saved index ahead of the first request."""
+        self._ensure_index_loaded()
+        return self.embeddings is not None
+
+    @staticmethod
+    def document_id(document: Document) -> str:
+        """Stable id for a document: hash of its symbol tag and content."""
+        key = f"{document.metadata.get('symbol', '')}\0{document.page_content}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _add_batch(self, docs: List[Document], ids: List[str], now: float) -> None:
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_documents(docs, self.embeddings, ids=ids)
+        else:
+            self.vector_store.add_documents(docs, ids=ids)
+        for doc_id in ids:
+            self.indexed_at[doc_id] = now
+
+    @tracer.traced("retriever_agent.index_documents")
+    def index_documents(self, documents: Iterable[Document], symbol: Optional[str] = None,
+                        batch_size: int = 64) -> None:
+        """Add new documents to the FAISS index, skipping content that is already indexed.
+
+        documents may be a lazy iterator; new documents are embedded in batches of batch_size as
+        they arrive, so splitting and embedding overlap.
+        """
         try:
-            self.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            self.vector_store = None
+            if not self.embeddings:
+                logger.warning("No embeddings available for indexing")
+                return
+            with self._lock:
+                self._ensure_index_loaded()
+                now = time.time()
+                seen = added = 0
+                batch, batch_ids = [], {}
+                for doc in documents:
+                    seen += 1
+                    if symbol:
+                        doc.metadata["symbol"] = symbol
+                    doc_id = self.document_id(doc)
+                    if doc_id in self.indexed_at:
+                        # Seeing a document again keeps it fresh
+                        self.indexed_at[doc_id] = now
+                    elif doc_id not in batch_ids:
+                        doc.metadata["indexed_at"] = now
+                        batch.append(doc)
+                        batch_ids[doc_id] = None
+                        if len(batch) >= batch_size:
+                            self._add_batch(batch, list(batch_ids), now)
+                            added += len(batch)
+                            batch, batch_ids = [], {}
+                if batch:
+                    self._add_batch(batch, list(batch_ids), now)
+                    added += len(batch)
+                if not seen:
+                    logger.warning("No documents available for indexing")
+                    return
+                logger.info(f"Indexed {added} new documents ({seen - added} already indexed)")
+                evicted = self.evict_stale()
+                if self.index_dir and (added or evicted):
+                    self.save()
+        except Exception as e:
+            logger.error(f"Error indexing documents: {str(e)}")
+
+    def evict_stale(self, max_age_seconds: Optional[float] = None) -> int:
+        """Drop documents not seen within max_age_seconds; returns the number evicted."""
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale_ids = [doc_id for doc_id, seen in self.indexed_at.items() if seen < cutoff]
+            if not stale_ids:
+                return 0
+            for doc_id in stale_ids:
+                del self.indexed_at[doc_id]
+            if not self.indexed_at:
+                self.vector_store = None
+            elif self.vector_store is not None:
+                self.vector_store.delete(stale_ids)
+            logger.info(f"Evicted {len(stale_ids)} stale documents from the index")
+            return len(stale_ids)
+
+    def save(self) -> None:
+        """Persist the index and its freshness metadata to index_dir."""
+        try:
+            with self._lock:
+                os.makedirs(self.index_dir, exist_ok=True)
+                meta_path = os.path.join(self.index_dir, "indexed_at.json")
+                if self.vector_store is None:
+                    if os.path.exists(meta_path):
+                        os.remove(meta_path)
+                    return
+                self.vector_store.save_local(self.index_dir)
+                with open(meta_path + ".tmp", "w") as f:
+                    json.dump(self.indexed_at, f)
+                os.replace(meta_path + ".tmp", meta_path)
         except Exception as e:
-            logger.error(f"Error initializing retriever: {str(e)}")
-            self.embeddings = None
+            logger.error(f"Error saving index to {self.index_dir}: {str(e)}")
 
-    def index_documents(self, documents: List[Document]) -> None:
-        """Index documents using FAISS."""
+    def load(self) -> None:
+        """Load a previously saved index from index_dir, if present."""
+        meta_path = os.path.join(self.index_dir, "indexed_at.json")
+        if not self.embeddings or not os.path.exists(meta_path):
+            return
         try:
-            if documents and self.embeddings:
-                self.vector_store = FAISS.from_documents(documents, self.embeddings)
-            else:
-                logger.warning("No documents or embeddings available for indexing")
+            with self._lock:
+                # The index directory is written only by this agent
+                self.vector_store = FAISS.load_local(self.index_dir, self.embeddings,
+                                                     allow_dangerous_deserialization=True)
+                with open(meta_path) as f:
+                    self.indexed_at = json.load(f)
+                logger.info(f"Loaded {len(self.indexed_at)} indexed documents from {self.index_dir}")
+            self.evict_stale()
         except Exception as e:
-            logger.error(f"Error indexing documents: {str(e)}")
+            logger.error(f"Error loading index from {self.index_dir}: {str(e)}")
+            self.vector_store = None
+            self.indexed_at = {}
 
-    def retrieve(self, query: str, k: int = 5) -> List[Document]:
-        """Retrieve top-k relevant documents."""
+    def retrieve(self, query: str, k: int = 5, symbol: Optional[str] = None) -> List[Document]:
+        """Retrieve top-k relevant documents, optionally restricted to one symbol's news."""
+        results = self.retrieve_many([query], k=k, symbol=symbol)
+        return [doc for doc, _ in results[0]] if results else []
+
+    @tracer.traced("retriever_agent.retrieve_many")
+    def retrieve_many(self, queries: List[str], k: int = 5, score_threshold: Optional[float] = None,
+                      symbol: Union[str, List[Optional[str]], None] = None) -> List[List[Tuple[Document, float]]]:
+        """Retrieve top-k (document, score) pairs for each query with one embedding pass and one FAISS search.
+
+        Scores are cosine similarities (the embeddings are unit-normalised), so higher is more
+        relevant; pairs scoring below score_threshold are dropped. symbol restricts results to one
+        symbol's news, either for all queries or per query when given as a list aligned with queries.
+        """
         try:
-            if self.vector_store:
-                return self.vector_store.similarity_search(query, k=k)
-            return []
+            if not queries:
+                return []
+            with self._lock:
+                self._ensure_index_loaded()
+                if not self.vector_store or not self.embeddings:
+                    return [[] for _ in queries]
+                symbols = symbol if isinstance(symbol, list) else [symbol] * len(queries)
+                query_matrix = np.asarray(self.embeddings.embed_queries(queries), dtype=np.float32)
+                index = self.vector_store.index
+
+                def collect(row_distances, row_positions, symbol):
+                    hits = []
+                    for distance, position in zip(row_distances, row_positions):
+                        if position < 0:
+                            continue
+                        doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[position])
+                        if not isinstance(doc, Document):
+                            continue
+                        if symbol and doc.metadata.get("symbol") != symbol:
+                            continue
+                        score = 1.0 - float(distance) / 2.0
+                        if score_threshold is not None and score < score_threshold:
+                            # Rows are sorted by distance, so the rest score lower
+                            break
+                        hits.append((doc, score))
+                        if len(hits) == k:
+                            break
+                    return hits
+
+                # Over-fetch when filtering by symbol since other symbols' hits are discarded
+                fetch_k = min(k * 4 if any(symbols) else k, index.ntotal)
+                distances, positions = index.search(query_matrix, fetch_k)
+                results = [collect(d, p, s) for d, p, s in zip(distances, positions, symbols)]
+
+                # Filtered queries that came up short are searched again over the whole index
+                short = [i for i, hits in enumerate(results)
+                         if symbols[i] and len(hits) < k and fetch_k < index.ntotal]
+                if short:
+                    distances, positions = index.search(query_matrix[short], index.ntotal)
+                    for i, d, p in zip(short, distances, positions):
+                        results[i] = collect(d, p, symbols[i])
+                return results
         except Exception as e:
             logger.error(f"Error retrieving documents: {str(e)}")
-            return []
\ No newline at end of file
+            return [[] for _ in queries]
@@ -0,0 +1,103 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from data_ingestion.history_store import PriceHistoryStore
+from utils.tracing import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _DrawdownState:
+    """Running peak and maximum drawdown over a symbol's settled bars."""
+
+    def __init__(self):
+        self.bars = 0
+        self.last_date = None
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+
+class RiskAgent:
+    """Rolling risk metrics computed from PriceHistoryStore closes.
+
+    Volatility and VaR/CVaR use the last `window` daily log returns. Max drawdown covers the
+    whole stored history and is updated incrementally: only bars added since the previous call
+    are scanned. The latest bar is treated as provisional, since intraday refreshes revise it.
+    """
+
+    def __init__(self, store: PriceHistoryStore, window: int = 20, confidence: float = 0.95,
+                 periods_per_year: int = 252):
+        self.store = store
+        self.window = window
+        self.confidence = confidence
+        self.periods_per_year = periods_per_year
+        self._drawdowns: Dict[str, _DrawdownState] = {}
+        self._lock = threading.Lock()
+
+    def _max_drawdown(self, symbol: str, dates: np.ndarray, closes: np.ndarray) -> float:
+        with self._lock:
+            state = self._drawdowns.get(symbol)
+            settled = len(closes) - 1
+            if state is None or state.bars > settled or (
+                    state.bars and dates[state.bars - 1] != state.last_date):
+                # History was rewritten (or first call): rebuild from scratch
+                state = _DrawdownState()
+                self._drawdowns[symbol] = state
+            if settled > state.bars:
+                new = closes[state.bars:settled]
+                peaks = np.maximum.accumulate(np.concatenate([[state.peak], new]))[1:]
+                state.max_drawdown = max(state.max_drawdown, float(np.max(1 - new / peaks)))
+                state.peak = float(peaks[-1])
+                state.bars = settled
+                state.last_date = dates[settled - 1]
+            peak = max(state.peak, float(closes[-1]))
+            return max(state.max_drawdown, 1 - float(closes[-1]) / peak) if peak > 0 else 0.0
+
+    def symbol_metrics(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Annualized volatility, historical VaR/CVaR (as positive loss fractions) and max drawdown for one symbol."""
+        try:
+            series = self.store.get(symbol)
+            if series is None:
+                return None
+            dates, closes = series["date"], series["close"]
+            valid = np.isfinite(closes) & (closes > 0)
+            dates, closes = dates[valid], closes[valid]
+            if len(closes) < 3:
+                return None
+            returns = np.diff(np.log(closes[-(self.window + 1):]))
+            tail = np.quantile(returns, 1 - self.confidence)
+            losses_beyond = returns[returns <= tail]
+            return {
+                "volatility": float(returns.std(ddof=1) * np.sqrt(self.periods_per_year)),
+                "var": float(-tail),
+                "cvar": float(-losses_beyond.mean()),
+                "max_drawdown": self._max_drawdown(symbol, dates, closes),
+                "observations": int(len(returns)),
+            }
+        except Exception as e:
+            logger.error(f"Error computing risk metrics for {symbol}: {str(e)}")
+            return None
+
+    def correlation(self, symbols: List[str]) -> Optional[np.ndarray]:
+        """Correlation matrix of daily log returns over the shared window, ordered like symbols."""
+        _, closes = self.store.aligned_closes(symbols, self.window + 1)
+        if len(symbols) < 2 or closes.shape[0] < 3:
+            return None
+        returns = np.diff(np.log(closes), axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.corrcoef(returns, rowvar=False)
+
+    @tracer.traced("risk_agent.portfolio_risk")
+    def portfolio_risk(self, symbols: List[str]) -> Dict[str, Any]:
+        """Per-symbol metrics plus the correlation matrix and mean pairwise correlation."""
+        per_symbol = {s: m for s in symbols for m in [self.symbol_metrics(s)] if m is not None}
+        result: Dict[str, Any] = {"symbols": per_symbol, "correlation": None, "avg_correlation": None}
+        covered = [s for s in symbols if s in per_symbol]
+        matrix = self.correlation(covered)
+        if matrix is not None:
+            pairs = matrix[np.triu_indices(len(covered), k=1)]
+            pairs = pairs[np.isfinite(pairs)]
+            result["correlation"] = {"symbols": covered, "matrix": matrix.tolist()}
+            result["avg_correlation"] = float(pairs.mean()) if len(pairs) else None
+        logger.info(f"Risk metrics computed for {len(per_symbol)} of {len(symbols)} symbols")
+        return result
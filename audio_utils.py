@@ -1,19 +1,155 @@
-from gtts import gTTS
-import os
+import hashlib
+import io
 import logging
+import os
+import re
+import shutil
+import subprocess
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from utils.cache import TTLCache
+from utils.tracing import tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_audio(text: str, output_path: str) -> bool:
-    """Generate audio from text using gTTS and save to output_path."""
-    try:
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Turn a markdown brief into speakable sentences, one bullet or sentence each."""
+    sentences = []
+    for line in text.splitlines():
         # Convert bullet points to natural speech
-        clean_text = text.replace("- **", "").replace("**:", ":").replace("\n", ". ")
-        tts = gTTS(text=clean_text, lang="en", slow=False)
-        tts.save(output_path)
-        logger.info(f"Audio generated and saved to {output_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Error generating audio: {str(e)}")
-        return False
\ No newline at end of file
+        line = line.strip().replace("- **", "").replace("**:", ":").replace("**", "").strip()
+        sentences.extend(s.strip() for s in SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+
+class GTTSBackend:
+    """Google Translate TTS (needs network); produces MP3."""
+    name = "gtts"
+    mime = "audio/mp3"
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+        self.voice = lang
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=self.lang, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def concatenate(clips: List[bytes]) -> bytes:
+        # MP3 is a sequence of self-contained frames, so clips join byte for byte (as gTTS does for long text)
+        return b"".join(clips)
+
+
+class EspeakBackend:
+    """Local espeak-ng/espeak synthesis, usable offline; produces WAV."""
+    name = "espeak"
+    mime = "audio/wav"
+
+    def __init__(self, voice: str = "en", words_per_minute: int = 170):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.binary is None:
+            raise RuntimeError("espeak-ng or espeak must be installed for the espeak TTS backend")
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+
+    def synthesize(self, text: str) -> bytes:
+        result = subprocess.run([self.binary, "-v", self.voice, "-s", str(self.words_per_minute), "--stdout", text],
+                                capture_output=True, check=True, timeout=30)
+        return result.stdout
+
+    @staticmethod
+    def concatenate(clips: List[bytes]) -> bytes:
+        output = io.BytesIO()
+        writer = None
+        for clip in clips:
+            with wave.open(io.BytesIO(clip)) as reader:
+                if writer is None:
+                    writer = wave.open(output, "wb")
+                    writer.setparams(reader.getparams())
+                writer.writeframes(reader.readframes(reader.getnframes()))
+        if writer is not None:
+            writer.close()
+        return output.getvalue()
+
+
+BACKENDS = {"gtts": GTTSBackend, "espeak": EspeakBackend}
+
+
+def get_backend(name: Optional[str] = None):
+    """Instantiate a TTS backend by name, defaulting to TTS_BACKEND or gtts."""
+    name = name or os.getenv("TTS_BACKEND", "gtts")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+class AudioSynthesizer:
+    """Sentence-level TTS: sentences are synthesized concurrently and each clip is cached by text hash.
+
+    Briefs repeat headers and strategy sentences, so after the first few only new sentences reach
+    the backend. stream() yields clips in order as soon as each is ready; synthesize() returns the
+    whole brief as one in-memory clip plus the number of sentences it had to leave out.
+    """
+
+    def __init__(self, backend=None, max_workers: int = 4, cache_size: int = 512, cache_ttl: float = 24 * 3600):
+        self.backend = backend or get_backend()
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    @property
+    def mime(self) -> str:
+        return self.backend.mime
+
+    def _key(self, sentence: str) -> str:
+        return hashlib.sha256(f"{self.backend.name}\0{self.backend.voice}\0{sentence}".encode("utf-8")).hexdigest()
+
+    def _clip(self, sentence: str) -> bytes:
+        key = self._key(sentence)
+        clip = self.cache.get(key)
+        tracer.count("cache_requests_total", cache="audio", result="miss" if clip is None else "hit")
+        if clip is None:
+            # Failures propagate (and are not cached) so callers can tell the audio is incomplete
+            clip = self.backend.synthesize(sentence)
+            self.cache.set(key, clip)
+        return clip
+
+    def _submit(self, text: str) -> List[Tuple[str, Future]]:
+        return [(s, self.executor.submit(tracer.propagate(self._clip), s)) for s in split_sentences(text)]
+
+    def stream(self, text: str) -> Iterator[bytes]:
+        """Yield one clip per sentence in order; later sentences are synthesized while earlier ones play.
+
+        Raises the backend's error at the first sentence that could not be synthesized.
+        """
+        for _, future in self._submit(text):
+            yield future.result()
+
+    @tracer.traced("audio.synthesize")
+    def synthesize(self, text: str) -> Tuple[bytes, int]:
+        """Synthesize the whole text into one clip; returns (audio, number of sentences left out).
+
+        Sentences that fail are skipped and counted, so callers can warn about incomplete audio;
+        audio is empty when nothing could be synthesized.
+        """
+        clips, failed = [], 0
+        for sentence, future in self._submit(text):
+            try:
+                clips.append(future.result())
+            except Exception as e:
+                logger.error(f"Error synthesizing {sentence[:40]!r}: {str(e)}")
+                failed += 1
+        try:
+            audio = self.backend.concatenate(clips) if clips else b""
+        except Exception as e:
+            logger.error(f"Error generating audio: {str(e)}")
+            return b"", failed + len(clips)
+        logger.info(f"Audio generated ({len(audio)} bytes from {len(clips)} sentences, {failed} failed)")
+        return audio, failed
@@ -0,0 +1,74 @@
+"""Compare process_batch with calling process_query in a loop, offline.
+
+Uses the fake yfinance module and canned news pages (served through the real scrape_many, so
+the per-host limit applies) so only our own code is measured. Each mode runs on a fresh
+Orchestrator with freshly loaded models, so neither benefits from the other's caches. A run
+in which any pipeline stage degraded to its fallback is reported and exits non-zero, since its
+throughput would not be comparable.
+
+Usage: python benchmarks/bench_batch.py [num_portfolios] [symbols_per_portfolio] [universe_size]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "demo")
+
+from benchmarks import fake_yfinance
+from data_ingestion import api_agent
+from agents import model_registry
+from orchestrator.orchestrator import Orchestrator
+
+api_agent.yf = fake_yfinance
+NEWS_LATENCY = 0.3
+
+
+def canned_news(url: str) -> str:
+    time.sleep(NEWS_LATENCY)
+    symbol = url.rstrip("/").split("/")[-2]
+    return " ".join(f"{symbol} headline {i}: supply chain, AI demand and geopolitical risk update." for i in range(60))
+
+
+def make_orchestrator() -> Orchestrator:
+    model_registry.clear()
+    orchestrator = Orchestrator()
+    # Only the network fetch is replaced; caching, concurrency and max_per_host stay real
+    orchestrator.scraping_agent._fetch = lambda url: (canned_news(url), False)
+    orchestrator.warmup()
+    return orchestrator
+
+
+if __name__ == "__main__":
+    num_portfolios = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_portfolio = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    universe_size = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    fake_yfinance.LATENCY = 0.1
+    random.seed(0)
+    universe = [f"T{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(universe_size)]
+    queries = [f"What's the risk for {', '.join(random.sample(universe, per_portfolio))} today?"
+               for _ in range(num_portfolios)]
+
+    degraded = {}
+    orchestrator = make_orchestrator()
+    start = time.perf_counter()
+    for query in queries:
+        orchestrator.process_query(query)
+        for stage in orchestrator.last_degraded_stages:
+            degraded[f"loop {stage}"] = degraded.get(f"loop {stage}", 0) + 1
+    loop = time.perf_counter() - start
+
+    orchestrator = make_orchestrator()
+    orchestrator.process_batch(queries)
+    batch = orchestrator.last_batch_stats["seconds"]
+    for stage in orchestrator.last_degraded_stages:
+        degraded[f"batch {stage}"] = 1
+    print(f"batch stage timings: {', '.join(f'{k} {v:.2f}s' for k, v in orchestrator.last_stage_timings.items())}")
+
+    print(f"{num_portfolios} portfolios x {per_portfolio} symbols from {universe_size} tickers: "
+          f"loop {num_portfolios / loop * 60:.1f} briefs/min, batch {num_portfolios / batch * 60:.1f} briefs/min "
+          f"({loop / batch:.1f}x)")
+    if degraded:
+        print(f"WARNING: stages degraded to their fallbacks, results are not comparable: {degraded}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,65 @@
+"""Benchmark paragraph extraction backends on HTML pages.
+
+By default this runs on a generated page: 3000 short articles behind a large navigation block.
+Any benchmarks/fixtures/**/*.html files are used instead when present, for example news pages
+recorded with record_fixtures.py; none are committed. Backends that are not installed are skipped.
+
+Usage: python benchmarks/bench_extract.py [repeats]
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+from data_ingestion import scraping_agent
+from data_ingestion.scraping_agent import ScrapingAgent
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixtures() -> dict:
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "**", "*.html"), recursive=True)):
+        with open(path, "rb") as f:
+            fixtures[os.path.relpath(path, FIXTURE_DIR)] = f.read()
+    if not fixtures:
+        boilerplate = "<div class='nav'>" + "<a href='#'>link</a>" * 500 + "</div>"
+        body = "".join(f"<article><h2>Story {i}</h2><p>Paragraph {i} about <b>TSM</b> supply chain news.</p></article>"
+                       for i in range(3000))
+        fixtures["synthetic.html"] = f"<html><head><title>x</title></head><body>{boilerplate}{body}</body></html>".encode()
+    return fixtures
+
+
+def bs4_html_parser(raw: bytes) -> str:
+    soup = BeautifulSoup(raw.decode("utf-8", "replace"), "html.parser")
+    return " ".join(p.get_text().strip() for p in soup.find_all("p"))
+
+
+def backends() -> dict:
+    available = {"bs4 html.parser": bs4_html_parser}
+    if scraping_agent.HTMLParser is not None:
+        available["selectolax"] = lambda raw: ScrapingAgent.extract_text(raw.decode("utf-8", "replace"))
+    if scraping_agent.etree is not None:
+        chunked = lambda raw: (raw[i:i + 16384] for i in range(0, len(raw), 16384))
+        available["lxml streaming"] = lambda raw: ScrapingAgent.extract_stream(chunked(raw))
+        available["lxml streaming (100 paragraphs)"] = lambda raw: ScrapingAgent.extract_stream(chunked(raw), max_paragraphs=100)
+    return available
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, raw in load_fixtures().items():
+        print(f"{name} ({len(raw) / 1024:.0f} KiB)")
+        for backend, extract in backends().items():
+            tracemalloc.start()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                text = extract(raw)
+            elapsed = (time.perf_counter() - start) / repeats
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {backend:32s} {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:6.1f} MiB  {len(text)} chars")
@@ -0,0 +1,36 @@
+"""Compare serial and concurrent APIAgent fetches against the fake yfinance backend.
+
+Usage: python benchmarks/bench_fetch.py [num_symbols] [latency_seconds]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "demo")
+
+from benchmarks import fake_yfinance
+from data_ingestion import api_agent
+from data_ingestion.api_agent import APIAgent
+
+api_agent.yf = fake_yfinance
+
+
+def run(max_workers: int, symbols: list) -> float:
+    agent = APIAgent(max_workers=max_workers, call_timeout=60)
+    start = time.perf_counter()
+    market_data, earnings = agent.fetch_all(symbols)
+    elapsed = time.perf_counter() - start
+    assert set(market_data) == set(earnings) == set(symbols)
+    agent.executor.shutdown()
+    return elapsed
+
+
+if __name__ == "__main__":
+    num_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    fake_yfinance.LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    symbols = [f"SYM{i}" for i in range(num_symbols)]
+    serial = run(1, symbols)
+    concurrent = run(num_symbols * 2, symbols)
+    print(f"{num_symbols} symbols @ {fake_yfinance.LATENCY * 1000:.0f}ms/call: "
+          f"serial {serial:.2f}s, concurrent {concurrent:.2f}s ({serial / concurrent:.1f}x)")
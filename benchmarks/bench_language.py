@@ -0,0 +1,30 @@
+"""Compare narrative generation throughput: one prompt at a time vs batched, fp32 vs int8.
+
+Caching is bypassed (every prompt is distinct) so each mode measures the model itself.
+
+Usage: python benchmarks/bench_language.py [num_prompts] [batch_size] [num_threads]
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.language_agent import LanguageAgent
+
+if __name__ == "__main__":
+    num_prompts = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    num_threads = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    items = [(f"TSM reported revenue growth of {i}% on AI demand while supply chain risk in Asia persists.",
+              f"What is the outlook for portfolio {i}?") for i in range(num_prompts)]
+
+    for quantize in (False, True):
+        for batched in (False, True):
+            agent = LanguageAgent(quantize=quantize, num_threads=num_threads,
+                                  batch_size=batch_size if batched else 1, cache_size=1)
+            agent.warmup()
+            agent.generate_narratives([("warm", "up")], max_new_tokens=4)
+            agent.generate_narratives(items, max_new_tokens=50)
+            stats = agent.last_stats
+            print(f"{stats['mode']} batch={agent.batch_size}: {stats['generated_tokens']} tokens in "
+                  f"{stats['seconds']:.2f}s ({stats['tokens_per_second']:.1f} tokens/s)")
@@ -0,0 +1,64 @@
+"""Benchmark the vectorized PortfolioFrame against per-symbol dict loops.
+
+Usage: python benchmarks/bench_portfolio.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from agents.portfolio_engine import PortfolioFrame
+
+SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Industrials"]
+
+
+def make_book(n: int, rng: np.random.Generator):
+    symbols = [f"S{i}" for i in range(n)]
+    prices = rng.uniform(5, 500, n)
+    weights = rng.uniform(1e4, 1e6, n)
+    estimated = rng.normal(1.5, 0.5, n)
+    reported = estimated * rng.normal(1.02, 0.05, n)
+    market_data = {s: {"price": p, "sector": SECTORS[i % len(SECTORS)]} for i, (s, p) in enumerate(zip(symbols, prices))}
+    earnings = {s: {"Reported EPS": r, "Estimated EPS": e} for s, r, e in zip(symbols, reported, estimated)}
+    return market_data, dict(zip(symbols, weights)), earnings
+
+
+def loop_analytics(market_data, weights, earnings):
+    # Equivalent of the previous per-symbol AnalysisAgent code
+    total_aum = sum(weights.values())
+    exposure = sum(w * market_data.get(s, {}).get("price", 0) for s, w in weights.items()) / total_aum * 100
+    surprises = {}
+    for s in weights:
+        e = earnings.get(s, {})
+        est = e.get("Estimated EPS", 0)
+        surprises[s] = (e.get("Reported EPS", 0) - est) / est * 100 if est else 0.0
+    sectors = {}
+    for s, w in weights.items():
+        sector = market_data.get(s, {}).get("sector", "Unknown")
+        sectors[sector] = sectors.get(sector, 0) + w / total_aum
+    return exposure, surprises, sectors
+
+
+def timed(fn, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'positions':>10} {'dict loops':>12} {'from_dicts+summary':>20} {'arrays only':>12}")
+    for n in (10, 100, 1_000, 10_000, 100_000):
+        market_data, weights, earnings = make_book(n, rng)
+        frame = PortfolioFrame.from_dicts(market_data, weights, earnings)
+        exposure, surprises, _ = loop_analytics(market_data, weights, earnings)
+        assert abs(frame.exposure() - exposure) < 1e-6 * max(1.0, abs(exposure))
+        loop = timed(lambda: loop_analytics(market_data, weights, earnings))
+        full = timed(lambda: PortfolioFrame.from_dicts(market_data, weights, earnings).summary())
+        arrays = timed(frame.summary)
+        print(f"{n:>10} {loop * 1000:>10.2f}ms {full * 1000:>18.2f}ms {arrays * 1000:>10.2f}ms")
@@ -0,0 +1,205 @@
+"""Benchmark the full process_query path offline, replaying recorded fixtures.
+
+Runs queries over 1, 10 and 100 symbols with cold caches (a fresh Orchestrator per query:
+empty symbol, history, scrape and embedding caches; models stay loaded, see bench_startup.py
+for load time) and warm caches (one Orchestrator, primed by an untimed run). Reports p50/p95
+latency per pipeline stage and for the whole query, throughput, and peak Python heap. Peak
+heap comes from a separate tracemalloc pass so it does not slow the timed runs; per-stage
+peaks are the highest heap sampled while that stage ran, and concurrent stages overlap.
+
+Usage: python benchmarks/bench_query.py [--iterations N] [--sizes 1,10,100] [--latency-scale X]
+                                         [--baseline PATH] [--save-baseline] [--tolerance 0.2]
+With --baseline the run exits non-zero when any p95 latency or peak heap exceeds the baseline
+by more than the tolerance; --save-baseline writes the current results there instead.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "demo")
+# Caches must start empty and stay in memory
+for name in ("PRICE_HISTORY_DIR", "RETRIEVER_INDEX_DIR", "EMBEDDING_CACHE_PATH"):
+    os.environ.pop(name, None)
+
+from benchmarks import replay
+from data_ingestion import api_agent
+from orchestrator.orchestrator import Orchestrator
+from utils.tracing import tracer
+
+api_agent.yf = replay
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Stages faster than this in the baseline are too noisy to gate on
+MIN_GATED_MS = 5.0
+
+
+def scenario_symbols(size: int) -> List[str]:
+    recorded = replay.recorded_symbols()
+    synthetic = (f"Q{chr(65 + i // 676 % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}" for i in range(size))
+    return (recorded + list(synthetic))[:size]
+
+
+def make_orchestrator() -> Orchestrator:
+    orchestrator = Orchestrator()
+    orchestrator.scraping_agent = replay.ReplayScrapingAgent()
+    orchestrator.warmup()
+    return orchestrator
+
+
+def cold_orchestrator() -> Orchestrator:
+    orchestrator = make_orchestrator()
+    # The embedding cache lives with the shared model, so it survives new orchestrators
+    if orchestrator.retriever_agent.embeddings is not None:
+        orchestrator.retriever_agent.embeddings.clear()
+    return orchestrator
+
+
+def close(orchestrator: Orchestrator) -> None:
+    for executor in (orchestrator.executor, orchestrator.api_agent.executor, orchestrator.scraping_agent.executor):
+        executor.shutdown(wait=False)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    return {"p50_ms": float(np.percentile(values, 50)) * 1000, "p95_ms": float(np.percentile(values, 95)) * 1000}
+
+
+class HeapSampler(threading.Thread):
+    """Samples tracemalloc's current heap size until stopped."""
+
+    def __init__(self, interval: float = 0.002):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: List[tuple] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.samples.append((time.time(), tracemalloc.get_traced_memory()[0]))
+            time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def measure_memory(orchestrator: Orchestrator, query: str) -> Dict[str, float]:
+    """Peak heap growth (KB) over the query and while each stage ran."""
+    enabled = tracer.enabled
+    tracer.enabled = True
+    tracer.reset()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sampler = HeapSampler()
+    sampler.start()
+    try:
+        orchestrator.process_query(query)
+    finally:
+        sampler.stop()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        tracer.enabled = enabled
+    memory = {"query": (peak - baseline) / 1024}
+    for span in tracer.last_trace():
+        if span["name"].startswith("stage."):
+            end = span["started_at"] + span["duration_ms"] / 1000
+            during = [size for at, size in sampler.samples if span["started_at"] <= at <= end]
+            memory[span["name"][len("stage."):]] = (max(during, default=baseline) - baseline) / 1024
+    return memory
+
+
+def run_scenario(size: int, warm: bool, iterations: int) -> dict:
+    query = f"What's the risk for {', '.join(scenario_symbols(size))} today?"
+    stages: Dict[str, List[float]] = {}
+    totals = []
+    orchestrator = make_orchestrator() if warm else None
+    if warm:
+        orchestrator.process_query(query)
+    replay.reset_calls()
+    for _ in range(iterations):
+        if not warm:
+            orchestrator = cold_orchestrator()
+        start = time.perf_counter()
+        orchestrator.process_query(query)
+        totals.append(time.perf_counter() - start)
+        for stage, seconds in orchestrator.last_stage_timings.items():
+            if stage != "total":
+                stages.setdefault(stage, []).append(seconds)
+        if not warm:
+            close(orchestrator)
+    calls = replay.reset_calls()
+
+    if not warm:
+        orchestrator = cold_orchestrator()
+    memory = measure_memory(orchestrator, query)
+    close(orchestrator)
+    return {
+        "query": dict(percentiles(totals), peak_kb=memory["query"]),
+        "stages": {stage: dict(percentiles(values), peak_kb=memory.get(stage, 0.0))
+                   for stage, values in stages.items()},
+        "queries_per_minute": iterations / sum(totals) * 60,
+        "symbols_per_second": iterations * size / sum(totals),
+        "calls_per_query": {call: count / iterations for call, count in calls.items()},
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    failures = []
+
+    def check(label: str, current: float, previous: float, floor: float = 0.0) -> None:
+        if previous >= floor and current > previous * (1 + tolerance):
+            failures.append(f"{label}: {current:.1f} vs baseline {previous:.1f}")
+
+    for scenario, result in results.items():
+        previous = baseline.get(scenario)
+        if previous is None:
+            continue
+        check(f"{scenario} query p95_ms", result["query"]["p95_ms"], previous["query"]["p95_ms"])
+        check(f"{scenario} query peak_kb", result["query"]["peak_kb"], previous["query"]["peak_kb"])
+        for stage, stats in result["stages"].items():
+            if stage in previous["stages"]:
+                check(f"{scenario} {stage} p95_ms", stats["p95_ms"], previous["stages"][stage]["p95_ms"],
+                      floor=MIN_GATED_MS)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--sizes", default="1,10,100")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiplier on recorded network latency (0 measures only our own code)")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    replay.LATENCY_SCALE = args.latency_scale
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        for warm in (False, True):
+            scenario = f"{size}-{'warm' if warm else 'cold'}"
+            results[scenario] = result = run_scenario(size, warm, args.iterations)
+            print(f"{scenario}: query p50 {result['query']['p50_ms']:.0f} ms, p95 {result['query']['p95_ms']:.0f} ms, "
+                  f"{result['queries_per_minute']:.1f} queries/min, peak heap {result['query']['peak_kb']:.0f} KB")
+            for stage, stats in result["stages"].items():
+                print(f"  {stage:<9} p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+                      f"peak {stats['peak_kb']:8.0f} KB")
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    elif args.baseline:
+        with open(baseline_path) as f:
+            failures = regressions(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        sys.exit(1 if failures else 0)
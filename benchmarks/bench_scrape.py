@@ -0,0 +1,76 @@
+"""Exercise ScrapingAgent against a local HTTP stub server.
+
+Checks that repeated fetches hit the TTL cache, expired entries are revalidated with a
+conditional GET (304), and scrape_many fetches concurrently.
+
+Usage: python benchmarks/bench_scrape.py [num_urls] [latency_seconds]
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_ingestion.scraping_agent import ScrapingAgent
+
+LATENCY = 0.1
+stats = {"200": 0, "304": 0}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        etag = f'"{abs(hash(self.path))}"'
+        if self.headers.get("If-None-Match") == etag:
+            stats["304"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        stats["200"] += 1
+        body = "".join(f"<p>Paragraph {i} for {self.path}</p>" for i in range(200)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    num_urls = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/news/{i}" for i in range(num_urls)]
+
+    agent = ScrapingAgent(cache_ttl=60)
+    start = time.perf_counter()
+    for url in urls:
+        agent.scrape_filings(url)
+    serial = time.perf_counter() - start
+
+    agent = ScrapingAgent(cache_ttl=60)
+    start = time.perf_counter()
+    agent.scrape_many(urls)
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    agent.scrape_many(urls)
+    cached = time.perf_counter() - start
+
+    agent.response_cache.clear()
+    stats["304"] = 0
+    agent.scrape_many(urls)
+
+    print(f"{num_urls} urls @ {LATENCY * 1000:.0f}ms: serial {serial:.2f}s, scrape_many {concurrent:.2f}s, "
+          f"cached {cached * 1000:.1f}ms, revalidated {stats['304']}/{num_urls} with 304")
+    server.shutdown()
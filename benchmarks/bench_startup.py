@@ -0,0 +1,25 @@
+"""Measure Orchestrator startup time and peak RSS with and without warmup.
+
+Usage: python benchmarks/bench_startup.py [--warmup] [--language-model]
+Run each mode in a fresh process, since models are shared process-wide once loaded.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "demo")
+
+from agents.model_registry import peak_rss_mb
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    from orchestrator.orchestrator import Orchestrator
+    orchestrator = Orchestrator()
+    print(f"construct: {time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MB")
+    if "--warmup" in sys.argv:
+        timings = orchestrator.warmup(language_model="--language-model" in sys.argv)
+        print(f"warmup: {timings}")
+    start = time.perf_counter()
+    Orchestrator()
+    print(f"second instance: {time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MB")
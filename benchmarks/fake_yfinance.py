@@ -0,0 +1,45 @@
+"""Offline stand-in for the subset of yfinance used by APIAgent.
+
+Every attribute access sleeps for LATENCY seconds to mimic a network round trip.
+"""
+import time
+import zlib
+import pandas as pd
+
+LATENCY = 0.2
+calls = {"info": 0, "history": 0, "earnings_dates": 0}
+
+
+class Ticker:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._seed = zlib.crc32(symbol.encode())
+
+    @property
+    def info(self) -> dict:
+        calls["info"] += 1
+        time.sleep(LATENCY)
+        return {
+            "symbol": self.symbol,
+            "regularMarketPrice": 50 + self._seed % 200,
+            "averageDailyVolume10Day": 1_000_000 + self._seed % 500_000,
+            "marketCap": 1e9 * (1 + self._seed % 500),
+            "sector": ["Technology", "Energy", "Financials", "Healthcare"][self._seed % 4],
+        }
+
+    def history(self, period: str = "1mo", **kwargs) -> pd.DataFrame:
+        calls["history"] += 1
+        time.sleep(LATENCY)
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=21)
+        base = 50 + self._seed % 200
+        close = [base * (1 + 0.01 * ((self._seed >> i) % 5 - 2)) for i in range(len(index))]
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                             "Volume": [1_000_000] * len(index)}, index=index)
+
+    @property
+    def earnings_dates(self) -> pd.DataFrame:
+        calls["earnings_dates"] += 1
+        time.sleep(LATENCY)
+        estimate = 1 + (self._seed % 100) / 100
+        return pd.DataFrame({"EPS Estimate": [estimate], "Reported EPS": [estimate * 1.05]},
+                            index=[pd.Timestamp.today().normalize()])
@@ -0,0 +1,69 @@
+"""Record live yfinance responses and news pages as fixtures for the offline benchmarks.
+
+For each symbol this writes fixtures/market/<SYMBOL>.json (ticker info, one month of history,
+earnings_dates and the latency of each call) and fixtures/news/<SYMBOL>.html (the page the
+orchestrator scrapes). Run once with network access; replay.py serves them back.
+
+Usage: python benchmarks/record_fixtures.py [SYMBOL ...]
+"""
+import json
+import os
+import sys
+import time
+
+import requests
+import yfinance as yf
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_SYMBOLS = ["TSM", "NVDA", "AAPL", "MSFT", "AMD", "INTC", "ASML", "XOM", "JPM", "JNJ"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def record_market(symbol: str) -> dict:
+    ticker = yf.Ticker(symbol)
+    info, info_seconds = timed(lambda: ticker.info)
+    history, history_seconds = timed(lambda: ticker.history(period="1mo"))
+    earnings, earnings_seconds = timed(lambda: ticker.earnings_dates)
+    return {
+        "symbol": symbol,
+        "recorded_at": time.time(),
+        "info": info,
+        "history": json.loads(history.to_json(orient="split", date_format="iso")),
+        "earnings_dates": (json.loads(earnings.to_json(orient="split", date_format="iso"))
+                           if earnings is not None else None),
+        "latency": {"info": info_seconds, "history": history_seconds, "earnings_dates": earnings_seconds},
+    }
+
+
+def record_news(session: requests.Session, symbol: str) -> tuple:
+    url = f"https://finance.yahoo.com/quote/{symbol}/news/"
+    response, seconds = timed(lambda: session.get(url, timeout=(5, 15)))
+    response.raise_for_status()
+    return response.content, seconds
+
+
+if __name__ == "__main__":
+    symbols = sys.argv[1:] or DEFAULT_SYMBOLS
+    os.makedirs(os.path.join(FIXTURE_DIR, "market"), exist_ok=True)
+    os.makedirs(os.path.join(FIXTURE_DIR, "news"), exist_ok=True)
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    for symbol in symbols:
+        try:
+            market = record_market(symbol)
+            html, news_seconds = record_news(session, symbol)
+        except Exception as e:
+            print(f"{symbol}: skipped ({e})")
+            continue
+        market["latency"]["news"] = news_seconds
+        with open(os.path.join(FIXTURE_DIR, "market", f"{symbol}.json"), "w") as f:
+            json.dump(market, f, default=str)
+        with open(os.path.join(FIXTURE_DIR, "news", f"{symbol}.html"), "wb") as f:
+            f.write(html)
+        print(f"{symbol}: {len(market['history']['data'])} bars, {len(html)} bytes of news, "
+              f"latency {', '.join(f'{k} {v:.2f}s' for k, v in market['latency'].items())}")
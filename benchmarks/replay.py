@@ -0,0 +1,115 @@
+"""Replay fixtures written by record_fixtures.py through the real agents, offline.
+
+Ticker stands in for yfinance.Ticker (install it with `api_agent.yf = replay`) and
+ReplayScrapingAgent serves recorded news pages through ScrapingAgent's own caching and
+extraction, so only the network is replaced. Each call sleeps for its recorded latency times
+LATENCY_SCALE. Symbols without a recording reuse one picked by a stable hash, which lets
+scenarios ask for more symbols than were recorded.
+"""
+import functools
+import glob
+import io
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from data_ingestion.scraping_agent import ScrapingAgent, etree
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+LATENCY_SCALE = 1.0
+calls = {"info": 0, "history": 0, "earnings_dates": 0, "news": 0}
+
+
+@functools.lru_cache(maxsize=None)
+def recorded_symbols() -> List[str]:
+    paths = glob.glob(os.path.join(FIXTURE_DIR, "market", "*.json"))
+    symbols = sorted(os.path.splitext(os.path.basename(path))[0] for path in paths)
+    if not symbols:
+        raise FileNotFoundError(f"No fixtures in {FIXTURE_DIR}; run benchmarks/record_fixtures.py first")
+    return symbols
+
+
+def source_symbol(symbol: str) -> str:
+    """The recorded symbol whose responses stand in for symbol."""
+    recorded = recorded_symbols()
+    return symbol if symbol in recorded else recorded[zlib.crc32(symbol.encode()) % len(recorded)]
+
+
+def _frame(split: dict) -> pd.DataFrame:
+    return pd.read_json(io.StringIO(json.dumps(split)), orient="split", convert_dates=False)
+
+
+@functools.lru_cache(maxsize=None)
+def load_market(symbol: str) -> dict:
+    with open(os.path.join(FIXTURE_DIR, "market", f"{symbol}.json")) as f:
+        market = json.load(f)
+    history = _frame(market["history"])
+    index = pd.to_datetime(history.index, utc=True).tz_convert(None).normalize()
+    # Shift the recording so its last bar is today, keeping incremental refreshes realistic
+    history.index = index + (pd.Timestamp.today().normalize() - index[-1])
+    market["history"] = history
+    if market.get("earnings_dates"):
+        earnings = _frame(market["earnings_dates"])
+        earnings.index = pd.to_datetime(earnings.index, utc=True)
+        market["earnings_dates"] = earnings
+    return market
+
+
+@functools.lru_cache(maxsize=None)
+def load_news(symbol: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, "news", f"{symbol}.html"), "rb") as f:
+        return f.read()
+
+
+def _wait(market: dict, call: str) -> None:
+    calls[call] += 1
+    delay = market["latency"].get(call, 0) * LATENCY_SCALE
+    if delay > 0:
+        time.sleep(delay)
+
+
+class Ticker:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._market = load_market(source_symbol(symbol))
+
+    @property
+    def info(self) -> dict:
+        _wait(self._market, "info")
+        return dict(self._market["info"], symbol=self.symbol)
+
+    def history(self, period: str = "1mo", start: str = None, **kwargs) -> pd.DataFrame:
+        _wait(self._market, "history")
+        history = self._market["history"]
+        return history[history.index >= pd.Timestamp(start)].copy() if start else history.copy()
+
+    @property
+    def earnings_dates(self) -> pd.DataFrame:
+        _wait(self._market, "earnings_dates")
+        earnings = self._market["earnings_dates"]
+        return earnings.copy() if earnings is not None else None
+
+
+class ReplayScrapingAgent(ScrapingAgent):
+    """ScrapingAgent whose fetches read recorded pages instead of the network."""
+
+    def _fetch(self, url: str) -> Tuple[str, bool]:
+        symbol = source_symbol(url.rstrip("/").split("/")[-2])
+        _wait(load_market(symbol), "news")
+        html = load_news(symbol)
+        if etree is not None:
+            chunks = (html[i:i + 16384] for i in range(0, len(html), 16384))
+            return self.extract_stream(chunks, self.max_bytes, self.max_paragraphs), False
+        return self.extract_text(html.decode("utf-8", "replace")), False
+
+
+def reset_calls() -> Dict[str, int]:
+    """Return the call counts so far and start counting again."""
+    counts = dict(calls)
+    for call in calls:
+        calls[call] = 0
+    return counts
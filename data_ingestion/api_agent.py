@@ -1,113 +1,374 @@
 import os
 import logging
+import threading
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, Any, List, Callable, Optional, Tuple
+import numpy as np
+import pandas as pd
 import yfinance as yf
+from data_ingestion.history_store import PriceHistoryStore
+from utils.cache import SnapshotCache, TTLCache
+from utils.rate_limiter import TokenBucket
+from utils.tracing import tracer
 from alpha_vantage.timeseries import TimeSeries
 from alpha_vantage.fundamentaldata import FundamentalData
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMPTY_MARKET_DATA = {"price": 0, "volume": 0, "market_cap": 0, "sector": "Unknown", "price_trend": "unknown"}
+EMPTY_EARNINGS = {"Reported EPS": 0, "Estimated EPS": 0}
+YFINANCE_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+ALPHA_VANTAGE_COLUMNS = {"open": "1. open", "high": "2. high", "low": "3. low", "close": "4. close", "volume": "5. volume"}
+# Per-minute throttling clears once the bucket refills; a spent daily quota does not until the next day.
+# Alpha Vantage's per-minute message also mentions the daily limit, so per-minute markers win.
+PER_MINUTE_MARKERS = ("per minute", "per second", "sparingly")
+DAILY_QUOTA_MARKERS = ("per day", "daily")
+RATE_LIMIT_MARKERS = ("call frequency", "call limit", "rate limit")
+# After a daily-quota error, calls with that key fail at once for this long instead of queueing for tokens
+DAILY_QUOTA_COOLDOWN = 3600
+
+# Alpha Vantage quotas are per key, so every agent using the same key shares one bucket
+_alpha_vantage_limiters: Dict[str, TokenBucket] = {}
+_alpha_vantage_limiters_lock = threading.Lock()
+_alpha_vantage_exhausted_until: Dict[str, float] = {}
+
+def throttle_kind(message: str) -> Optional[str]:
+    """Classify an Alpha Vantage error message as "minute" (retryable), "day" (quota spent) or None."""
+    message = message.lower()
+    if any(marker in message for marker in PER_MINUTE_MARKERS):
+        return "minute"
+    if any(marker in message for marker in DAILY_QUOTA_MARKERS):
+        return "day"
+    if any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return "minute"
+    return None
+
+def get_alpha_vantage_limiter(api_key: str) -> TokenBucket:
+    """Return the process-wide token bucket for an Alpha Vantage key."""
+    with _alpha_vantage_limiters_lock:
+        if api_key not in _alpha_vantage_limiters:
+            calls_per_minute = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5"))
+            _alpha_vantage_limiters[api_key] = TokenBucket.per_minute(calls_per_minute)
+        return _alpha_vantage_limiters[api_key]
+
 class APIAgent:
-    def __init__(self):
+    def __init__(self, max_workers: int = None, call_timeout: float = None):
         self.api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
         if not self.api_key:
             logger.error("Alpha Vantage API key not found in environment variables")
             raise ValueError("ALPHA_VANTAGE_API_KEY environment variable not set")
         self.ts = TimeSeries(key=self.api_key, output_format="pandas")
         self.fd = FundamentalData(key=self.api_key, output_format="json")
-        self.rate_limit_delay = 12  # 5 calls/minute = 12s delay for Alpha Vantage
+        # Shared by self.ts and self.fd; callers only wait when the key's quota is used up
+        self.rate_limiter = get_alpha_vantage_limiter(self.api_key)
+        # Valid tickers rarely change; invalid ones are cached for a shorter window
+        self.symbol_cache = TTLCache(maxsize=2048, ttl=6 * 3600)
+        self.negative_symbol_ttl = 15 * 60
+        # Bounded pool shared by all per-symbol fetches
+        self.max_workers = max_workers or int(os.getenv("API_AGENT_MAX_WORKERS", "8"))
+        self.call_timeout = call_timeout or float(os.getenv("API_AGENT_CALL_TIMEOUT", "20"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-agent")
+        # Daily bars are kept (on disk if PRICE_HISTORY_DIR is set) so only the missing tail is fetched
+        self.history_store = PriceHistoryStore(os.getenv("PRICE_HISTORY_DIR"))
+        # Fields are cached per class as (ttl, max_stale): within ttl a snapshot is served as is, and
+        # for max_stale after that it is still served at once while it refreshes in the background
+        self.snapshot_ttls = {
+            "quote": (60, 15 * 60),
+            "profile": (24 * 3600, 7 * 24 * 3600),
+            "earnings": (24 * 3600, 7 * 24 * 3600),
+        }
+        self.snapshots = SnapshotCache()
+        self.history_refresh_seconds = self.snapshot_ttls["quote"][0]
+
+    def _fan_out(self, jobs: List[Tuple[str, Callable[[], Any], Any]],
+                 deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Run keyed jobs on the shared pool and collect results, substituting defaults on failure or timeout.
+
+        Each job is a (key, callable, default) triple. The wait allows one call_timeout per wave
+        of max_workers jobs, so queued jobs are not penalised for waiting on the pool, but never
+        runs past deadline (a time.monotonic() value) if one is given. Jobs finished by then keep
+        their results; only the late ones get their default.
+        """
+        if not jobs:
+            return {}
+        futures: Dict[Future, Tuple[str, Any]] = {
+            self.executor.submit(tracer.propagate(fn)): (key, default) for key, fn, default in jobs
+        }
+        waves = -(-len(jobs) // self.max_workers)
+        timeout = self.call_timeout * waves
+        if deadline is not None:
+            timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+        done, pending = wait(futures, timeout=timeout)
+        results = {}
+        for future, (key, default) in futures.items():
+            if future in pending:
+                future.cancel()
+                logger.warning(f"Fetch for {key} timed out after {timeout:.0f}s")
+                results[key] = default
+                continue
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.error(f"Fetch for {key} failed: {str(e)}")
+                results[key] = default
+        return results
+
+    def _call_alpha_vantage(self, fn: Callable[..., Any], *args, attempts: int = 3, **kwargs) -> Any:
+        """Call an Alpha Vantage endpoint under the shared rate limiter, retrying when throttled.
+
+        Only per-minute throttling is retried. A spent daily quota fails at once, and later calls
+        with the same key fail without waiting for a token until DAILY_QUOTA_COOLDOWN has passed.
+        """
+        for attempt in range(attempts):
+            if time.time() < _alpha_vantage_exhausted_until.get(self.api_key, 0):
+                raise RuntimeError("Alpha Vantage daily quota exhausted")
+            if not self.rate_limiter.acquire(timeout=self.call_timeout):
+                raise TimeoutError(f"No Alpha Vantage quota available within {self.call_timeout:.0f}s "
+                                   f"(queue depth {self.rate_limiter.queue_depth})")
+            try:
+                tracer.count("external_calls_total", service="alpha_vantage", endpoint=fn.__name__)
+                return fn(*args, **kwargs)
+            except Exception as e:
+                kind = throttle_kind(str(e))
+                if kind == "day":
+                    logger.warning(f"Alpha Vantage daily quota exhausted; skipping calls for {DAILY_QUOTA_COOLDOWN}s")
+                    with _alpha_vantage_limiters_lock:
+                        _alpha_vantage_exhausted_until[self.api_key] = time.time() + DAILY_QUOTA_COOLDOWN
+                    raise
+                if kind is None or attempt == attempts - 1:
+                    raise
+                # Upstream disagrees with our accounting; empty the bucket so the retry waits a full refill
+                logger.warning(f"Alpha Vantage throttled {fn.__name__}({', '.join(map(str, args))}), retrying")
+                self.rate_limiter.penalize()
+
+    def _store_history(self, symbol: str, frame: pd.DataFrame, column_map: Dict[str, str]) -> None:
+        """Copy a provider's daily bar DataFrame into the history store."""
+        try:
+            index = pd.DatetimeIndex(frame.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            columns = {name: frame[source].to_numpy(dtype=np.float64)
+                       for name, source in column_map.items() if source in frame.columns}
+            self.history_store.append(symbol, index.values.astype("datetime64[D]"), columns)
+        except Exception as e:
+            logger.warning(f"Could not store price history for {symbol}: {str(e)}")
+
+    def _history_is_fresh(self, symbol: str) -> bool:
+        updated_at = self.history_store.updated_at(symbol)
+        return updated_at is not None and time.time() - updated_at < self.history_refresh_seconds
+
+    def _refresh_yfinance_history(self, symbol: str, ticker: Any) -> None:
+        """Fetch only the bars missing from the history store (the last stored bar is refetched, as it may be provisional)."""
+        if self._history_is_fresh(symbol):
+            tracer.count("cache_requests_total", cache="price_history", result="hit")
+            return
+        tracer.count("cache_requests_total", cache="price_history", result="miss")
+        tracer.count("external_calls_total", service="yfinance", endpoint="history")
+        last = self.history_store.last_date(symbol)
+        if last is None or np.datetime64("today", "D") - last > np.timedelta64(31, "D"):
+            history = ticker.history(period="1mo")  # Last 30 days
+        else:
+            history = ticker.history(start=str(last))
+        if not history.empty:
+            self._store_history(symbol, history, YFINANCE_COLUMNS)
+
+    def _latest_bar(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest close, 10-day average volume and the one-month price trend, read from the history store."""
+        series = self.history_store.get(symbol)
+        if series is None or not len(series["date"]):
+            return None
+        recent = series["date"] >= series["date"][-1] - np.timedelta64(31, "D")
+        closes = np.asarray(series["close"][recent])
+        closes = closes[np.isfinite(closes)]
+        if not len(closes):
+            return None
+        volumes = np.asarray(series["volume"][-10:])
+        volumes = volumes[np.isfinite(volumes)]
+        return {
+            "close": float(closes[-1]),
+            "volume": float(volumes.mean()) if len(volumes) else 0.0,
+            "price_trend": "up" if closes[-1] > closes[0] else "down"
+        }
 
     def validate_symbol(self, symbol: str) -> bool:
-        """Check if a symbol is valid using yfinance."""
+        """Check if a symbol is valid using yfinance, consulting the validation cache first."""
+        cached = self.symbol_cache.get(symbol)
+        tracer.count("cache_requests_total", cache="symbols", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
         try:
+            tracer.count("external_calls_total", service="yfinance", endpoint="info")
             ticker = yf.Ticker(symbol)
             info = ticker.info
             valid = bool(info and "symbol" in info)
+            if valid:
+                # The same response carries the slow-moving profile fields
+                self.snapshots.put(("profile", symbol), self._profile_from_info(info))
             logger.info(f"Symbol {symbol} validation: {'Valid' if valid else 'Invalid'}")
-            return valid
         except Exception as e:
+            # No answer from the provider (e.g. a timeout) says nothing about the symbol, so it is not cached
             logger.warning(f"Symbol validation failed for {symbol}: {str(e)}")
             return False
+        self.symbol_cache.set(symbol, valid, ttl=None if valid else self.negative_symbol_ttl)
+        return valid
+
+    def mark_valid(self, symbols: List[str]) -> None:
+        """Record symbols known to be valid (e.g. from the local ticker universe) so they are never looked up."""
+        for symbol in symbols:
+            if symbol not in self.symbol_cache:
+                self.symbol_cache.set(symbol, True)
+
+    def validate_symbols(self, symbols: List[str], deadline: Optional[float] = None) -> List[str]:
+        """Return the valid symbols in input order, resolving each unique ticker at most once."""
+        unique_symbols = list(dict.fromkeys(symbols))
+        # Cached verdicts are answered inline; cold lookups are resolved concurrently
+        verdicts = {s: self.validate_symbol(s) for s in unique_symbols if s in self.symbol_cache}
+        verdicts.update(self._fan_out(
+            [(s, lambda s=s: self.validate_symbol(s), False) for s in unique_symbols if s not in verdicts], deadline=deadline
+        ))
+        valid_symbols = [s for s in unique_symbols if verdicts[s]]
+        stats = self.symbol_cache.stats()
+        logger.info(f"Validated {len(unique_symbols)} symbols ({len(valid_symbols)} valid); "
+                    f"cache hits={stats['hits']} misses={stats['misses']}")
+        return valid_symbols
 
     def get_market_data(self, symbols: List[str]) -> Dict[str, Any]:
-        """Fetch market data using yfinance, fallback to Alpha Vantage."""
+        """Fetch market data for all symbols concurrently using yfinance, fallback to Alpha Vantage."""
         try:
-            data = {}
-            valid_symbols = [s for s in symbols if self.validate_symbol(s)]
+            valid_symbols = self.validate_symbols(symbols)
             if not valid_symbols:
                 logger.error("No valid symbols provided")
                 return {}
-
-            for symbol in valid_symbols:
-                try:
-                    # Try yfinance first
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    history = ticker.history(period="1mo")  # Last 30 days
-                    if not history.empty:
-                        price = float(info.get("regularMarketPrice", info.get("previousClose", info.get("bid", 0))))
-                        volume = float(info.get("averageDailyVolume10Day", info.get("volume", 0)))
-                        market_cap = float(info.get("marketCap", 0))
-                        sector = info.get("sector", info.get("industry", "Unknown"))
-                        price_trend = "up" if history["Close"].iloc[-1] > history["Close"].iloc[0] else "down"
-                        data[symbol] = {
-                            "price": price if price > 0 else 0,
-                            "volume": volume if volume > 0 else 0,
-                            "market_cap": market_cap,
-                            "sector": sector,
-                            "price_trend": price_trend
-                        }
-                        logger.info(f"yfinance data for {symbol}: {data[symbol]}")
-                    else:
-                        raise ValueError("yfinance returned incomplete data")
-                except Exception as e:
-                    logger.warning(f"yfinance failed for {symbol}: {str(e)}. Falling back to Alpha Vantage.")
-                    # Fallback to Alpha Vantage
-                    for attempt in range(3):
-                        try:
-                            data_df, _ = self.ts.get_daily(symbol, outputsize="compact")
-                            if not data_df.empty:
-                                latest_data = data_df.iloc[-1]
-                                price = float(latest_data["4. close"])
-                                volume = float(latest_data["5. volume"])
-                                price_trend = "up" if data_df["4. close"].iloc[-1] > data_df["4. close"].iloc[0] else "down"
-                                data[symbol] = {
-                                    "price": price if price > 0 else 0,
-                                    "volume": volume if volume > 0 else 0,
-                                    "market_cap": 0,
-                                    "sector": "Unknown",
-                                    "price_trend": price_trend
-                                }
-                                logger.info(f"Alpha Vantage data for {symbol}: {data[symbol]}")
-                            else:
-                                data[symbol] = {"price": 0, "volume": 0, "market_cap": 0, "sector": "Unknown", "price_trend": "unknown"}
-                                logger.warning(f"No market data returned for {symbol} by Alpha Vantage")
-                            break
-                        except Exception as e:
-                            if "API call frequency" in str(e) or "call limit" in str(e):
-                                logger.warning(f"Rate limit hit for {symbol}. Retrying in {2**attempt} seconds...")
-                                time.sleep(2**attempt)
-                            else:
-                                logger.error(f"Alpha Vantage failed for {symbol}: {str(e)}")
-                                data[symbol] = {"price": 0, "volume": 0, "market_cap": 0, "sector": "Unknown", "price_trend": "unknown"}
-                                break
-                        time.sleep(self.rate_limit_delay)
-            return data
+            return self._fan_out([
+                (s, lambda s=s: self._fetch_market_data(s), dict(EMPTY_MARKET_DATA)) for s in valid_symbols
+            ])
         except Exception as e:
             logger.error(f"Error fetching market data: {str(e)}")
             return {}
 
+    def get_earnings_many(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch earnings for all symbols concurrently."""
+        return self._fan_out([
+            (s, lambda s=s: self.get_earnings(s), dict(EMPTY_EARNINGS)) for s in dict.fromkeys(symbols)
+        ])
+
+    @tracer.traced("api_agent.fetch_all")
+    def fetch_all(self, symbols: List[str], timeout: Optional[float] = None
+                  ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Fetch market data and earnings for all symbols in a single fan-out.
+
+        Returns (market_data, earnings) with the same shapes as get_market_data and get_earnings_many.
+        With a timeout (seconds, covering validation too) the call returns by then, keeping every
+        symbol that finished and defaulting only the late ones.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            valid_symbols = self.validate_symbols(symbols, deadline=deadline)
+            if not valid_symbols:
+                logger.error("No valid symbols provided")
+                return {}, {}
+            jobs = []
+            for s in valid_symbols:
+                jobs.append((("market", s), lambda s=s: self._fetch_market_data(s), dict(EMPTY_MARKET_DATA)))
+                jobs.append((("earnings", s), lambda s=s: self.get_earnings(s), dict(EMPTY_EARNINGS)))
+            results = self._fan_out(jobs, deadline=deadline)
+            market_data = {s: results[("market", s)] for s in valid_symbols}
+            earnings = {s: results[("earnings", s)] for s in valid_symbols}
+            return market_data, earnings
+        except Exception as e:
+            logger.error(f"Error fetching market data and earnings: {str(e)}")
+            return {}, {}
+
+    def _snapshot(self, kind: str, symbol: str, loader: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], float]:
+        tracer.count("snapshot_requests_total", kind=kind)
+        ttl, max_stale = self.snapshot_ttls[kind]
+        return self.snapshots.get((kind, symbol), loader, ttl=ttl, max_stale=max_stale)
+
+    @staticmethod
+    def _profile_from_info(info: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "market_cap": float(info.get("marketCap", 0) or 0),
+            "sector": info.get("sector", info.get("industry", "Unknown")),
+        }
+
+    def _fetch_profile(self, symbol: str) -> Dict[str, Any]:
+        """Slow-moving fields (sector, market cap) from yfinance info; Alpha Vantage has no equivalent."""
+        tracer.count("external_calls_total", service="yfinance", endpoint="info")
+        info = yf.Ticker(symbol).info
+        if not info:
+            raise ValueError("yfinance returned no profile")
+        return self._profile_from_info(info)
+
+    def _fetch_quote(self, symbol: str) -> Dict[str, Any]:
+        """Fast-moving fields (price, volume, trend) from the latest daily bars, fallback to Alpha Vantage."""
+        latest = None
+        try:
+            # Try yfinance first; only the bars missing from the history store are fetched
+            self._refresh_yfinance_history(symbol, yf.Ticker(symbol))
+            latest = self._latest_bar(symbol)
+            if latest is None:
+                raise ValueError("yfinance returned incomplete data")
+            source = "yfinance"
+        except Exception as e:
+            logger.warning(f"yfinance failed for {symbol}: {str(e)}. Falling back to Alpha Vantage.")
+        if latest is None:
+            # Recently stored bars make the call unnecessary, saving quota
+            if not self._history_is_fresh(symbol):
+                data_df, _ = self._call_alpha_vantage(self.ts.get_daily, symbol, outputsize="compact")
+                self._store_history(symbol, data_df, ALPHA_VANTAGE_COLUMNS)
+            latest = self._latest_bar(symbol)
+            if latest is None:
+                raise ValueError(f"No market data returned for {symbol} by Alpha Vantage")
+            source = "Alpha Vantage"
+        result = {
+            "price": latest["close"] if latest["close"] > 0 else 0,
+            "volume": latest["volume"] if latest["volume"] > 0 else 0,
+            "price_trend": latest["price_trend"]
+        }
+        logger.info(f"{source} quote for {symbol}: {result}")
+        return result
+
+    @tracer.traced("api_agent.fetch_market_data")
+    def _fetch_market_data(self, symbol: str) -> Dict[str, Any]:
+        """Market data for a single symbol assembled from quote and profile snapshots.
+
+        Each field class is refetched on its own schedule (see snapshot_ttls); age_seconds is
+        the age of the quote the price comes from.
+        """
+        result = dict(EMPTY_MARKET_DATA)
+        try:
+            quote, age = self._snapshot("quote", symbol, lambda: self._fetch_quote(symbol))
+            result.update(quote, age_seconds=age)
+        except Exception as e:
+            logger.error(f"No quote available for {symbol}: {str(e)}")
+        try:
+            profile, _ = self._snapshot("profile", symbol, lambda: self._fetch_profile(symbol))
+            result.update(profile)
+        except Exception as e:
+            logger.warning(f"No profile available for {symbol}: {str(e)}")
+        return result
+
+    @tracer.traced("api_agent.get_earnings")
     def get_earnings(self, symbol: str) -> Dict[str, Any]:
-        """Fetch earnings data using yfinance, fallback to Alpha Vantage."""
+        """Latest reported and estimated EPS from the earnings snapshot, with its age_seconds."""
         try:
             if not self.validate_symbol(symbol):
                 logger.warning(f"Invalid symbol {symbol} for earnings")
                 return {"Reported EPS": 0, "Estimated EPS": 0}
+            earnings, age = self._snapshot("earnings", symbol, lambda: self._fetch_earnings(symbol))
+            return dict(earnings, age_seconds=age)
+        except Exception as e:
+            logger.error(f"Error fetching earnings for {symbol}: {str(e)}")
+            return {"Reported EPS": 0, "Estimated EPS": 0}
 
+    def _fetch_earnings(self, symbol: str) -> Dict[str, Any]:
+        """Fetch earnings data using yfinance, fallback to Alpha Vantage; raises when neither has any."""
+        try:
             # Try yfinance first
             ticker = yf.Ticker(symbol)
+            tracer.count("external_calls_total", service="yfinance", endpoint="earnings_dates")
             earnings = ticker.earnings_dates
             if earnings is not None and not earnings.empty and "Reported EPS" in earnings.columns:
                 latest_earnings = earnings.iloc[0]
@@ -122,26 +383,13 @@ class APIAgent:
         except Exception as e:
             logger.warning(f"yfinance earnings failed for {symbol}: {str(e)}. Falling back to Alpha Vantage.")
             # Fallback to Alpha Vantage
-            for attempt in range(3):
-                try:
-                    earnings_data, _ = self.fd.get_earnings_quarterly(symbol)
-                    if isinstance(earnings_data, list) and len(earnings_data) > 0:
-                        latest_earnings = earnings_data[0]
-                        earnings_result = {
-                            "Reported EPS": float(latest_earnings.get("reportedEPS", 0) or 0),
-                            "Estimated EPS": float(latest_earnings.get("estimatedEPS", 0) or 0)
-                        }
-                        logger.info(f"Alpha Vantage earnings for {symbol}: {earnings_result}")
-                        return earnings_result
-                    logger.warning(f"No earnings data returned for {symbol}")
-                    return {"Reported EPS": 0, "Estimated EPS": 0}
-                except Exception as e:
-                    if "API call frequency" in str(e) or "call limit" in str(e):
-                        logger.warning(f"Rate limit hit for {symbol} earnings. Retrying in {2**attempt} seconds...")
-                        time.sleep(2**attempt)
-                    else:
-                        logger.error(f"Error fetching earnings for {symbol}: {str(e)}")
-                        return {"Reported EPS": 0, "Estimated EPS": 0}
-                time.sleep(self.rate_limit_delay)
-            logger.error(f"Failed to fetch earnings for {symbol} after retries")
-            return {"Reported EPS": 0, "Estimated EPS": 0}
+            earnings_data, _ = self._call_alpha_vantage(self.fd.get_earnings_quarterly, symbol)
+            if isinstance(earnings_data, list) and len(earnings_data) > 0:
+                latest_earnings = earnings_data[0]
+                earnings_result = {
+                    "Reported EPS": float(latest_earnings.get("reportedEPS", 0) or 0),
+                    "Estimated EPS": float(latest_earnings.get("estimatedEPS", 0) or 0)
+                }
+                logger.info(f"Alpha Vantage earnings for {symbol}: {earnings_result}")
+                return earnings_result
+            raise ValueError(f"No earnings data returned for {symbol}")
@@ -1,20 +1,138 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+import hashlib
 import logging
+import re
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class SimHashIndex:
+    """Near-duplicate detector using 64-bit SimHash fingerprints over word shingles.
+
+    Exact repeats are caught by a content hash first. Fingerprints are split into bands so
+    candidates are found by exact band lookup instead of comparing against every fingerprint seen;
+    with more bands than max_distance, any fingerprint within max_distance bits shares at least one
+    band with the query. Only the most recent max_bucket_scan entries of a band bucket are compared,
+    which bounds the cost per chunk on repetitive text.
+
+    Chunks whose figures differ are never duplicates: templated filing text ("segment 3 grew 5%"
+    vs "segment 4 grew 7%") is a small SimHash distance apart but carries different facts, so the
+    sequence of numeric tokens must match exactly as well.
+    """
+
+    BITS = 64
+
+    def __init__(self, max_distance: int = 6, shingle_size: int = 2, max_bucket_scan: int = 64):
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.max_bucket_scan = max_bucket_scan
+        self.bands = max_distance + 1
+        self.band_bits = self.BITS // self.bands
+        self._buckets: List[Dict[Tuple[int, bytes], List[int]]] = [{} for _ in range(self.bands)]
+        self._exact = set()
+
+    def fingerprint(self, text: str) -> int:
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return 0
+        shingles = [" ".join(words[i:i + self.shingle_size])
+                    for i in range(max(1, len(words) - self.shingle_size + 1))]
+        digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+        # One row of 64 bits per shingle; a bit is set when more shingles have it set than not
+        bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(shingles), 8), axis=1)
+        majority = 2 * bits.sum(axis=0, dtype=np.int64) > len(shingles)
+        return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [fingerprint >> (band * self.band_bits) & mask for band in range(self.bands)]
+
+    @staticmethod
+    def _figures(text: str) -> bytes:
+        figures = " ".join(re.findall(r"\w*\d[\w.,]*", text))
+        return hashlib.blake2b(figures.encode("utf-8"), digest_size=8).digest()
+
+    def add_if_new(self, text: str) -> bool:
+        """Record text and return True, or return False if a near-duplicate was already recorded."""
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        if digest in self._exact:
+            return False
+        self._exact.add(digest)
+        fingerprint = self.fingerprint(text)
+        figures = self._figures(text)
+        keys = [(key, figures) for key in self._band_keys(fingerprint)]
+        for band, key in enumerate(keys):
+            for candidate in self._buckets[band].get(key, ())[-self.max_bucket_scan:]:
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    return False
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(fingerprint)
+        return True
+
+
 class DocumentLoader:
-    def load_and_split(self, text: str) -> List[Document]:
-        """Split text into chunks for embedding."""
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, dedupe: bool = True, max_distance: int = 6):
+        # Built once and reused for every document
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+        self.block_size = chunk_size * 16
+        self.chunk_overlap = chunk_overlap
+        self.dedupe = dedupe
+        self.max_distance = max_distance
+
+    def _cut(self, text: str, start: int, end: int) -> int:
+        """Where to end the block text[start:end]: the last paragraph break, else sentence end, else space."""
+        # Only the second half of the window is searched, so an early break cannot produce a tiny block
+        lower = start + (end - start) // 2
+        for separator, offset in (("\n\n", 0), (". ", 1), (" ", 0)):
+            position = text.rfind(separator, lower, end)
+            if position > start:
+                return position + offset
+        return end
+
+    def _blocks(self, text: str) -> Iterator[str]:
+        """Cut text into splitter-sized blocks at paragraph, sentence or word boundaries.
+
+        Consecutive blocks share chunk_overlap characters (started at a word boundary), so text at
+        a block boundary gets the same overlap as text inside a block.
+        """
+        start = 0
+        while len(text) - start > self.block_size:
+            cut = self._cut(text, start, start + self.block_size)
+            yield text[start:cut]
+            overlap_start = cut - self.chunk_overlap
+            if overlap_start > start:
+                space = text.find(" ", overlap_start, cut)
+                start = space + 1 if space != -1 else overlap_start
+            else:
+                start = cut
+        if start < len(text):
+            yield text[start:]
+
+    def iter_chunks(self, text: Union[str, Iterable[str]]) -> Iterator[Document]:
+        """Lazily split text (a string or a stream of text pieces) into chunks, dropping near-duplicates."""
+        seen = SimHashIndex(max_distance=self.max_distance) if self.dedupe else None
+        pieces = [text] if isinstance(text, str) else text
+        produced = dropped = 0
         try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=512,
-                chunk_overlap=50
-            )
-            return text_splitter.create_documents([text])
+            for piece in pieces:
+                for block in self._blocks(piece):
+                    for chunk in self.text_splitter.split_text(block):
+                        if seen is not None and not seen.add_if_new(chunk):
+                            dropped += 1
+                            continue
+                        produced += 1
+                        yield Document(page_content=chunk)
         except Exception as e:
             logger.error(f"Error splitting text: {str(e)}")
-            return []
\ No newline at end of file
+        if dropped:
+            logger.info(f"Split {produced} chunks, dropped {dropped} near-duplicates")
+
+    def load_and_split(self, text: str) -> List[Document]:
+        """Split text into chunks for embedding."""
+        return list(self.iter_chunks(text))
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+class PriceHistoryStore:
+    """Daily OHLCV bars per symbol, held as columnar NumPy arrays sorted by date.
+
+    Dates are datetime64[D]; each column is a float64 array aligned with them. With a root
+    directory, every symbol is persisted as one .npy file per column under a generation
+    directory, switched atomically through a CURRENT pointer file, and loaded back as read-only
+    memory maps (zero-copy).
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._series: Dict[str, Dict[str, np.ndarray]] = {}
+        self._updated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", symbol))
+
+    def _load(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-map a symbol's columns from disk; caller holds the lock."""
+        pointer = os.path.join(self._symbol_dir(symbol), "CURRENT")
+        if not os.path.exists(pointer):
+            return None
+        try:
+            with open(pointer) as f:
+                current = json.load(f)
+            generation = os.path.join(self._symbol_dir(symbol), current["generation"])
+            series = {name: np.load(os.path.join(generation, f"{name}.npy"), mmap_mode="r")
+                      for name in ("date",) + COLUMNS}
+            self._series[symbol] = series
+            self._updated_at[symbol] = current["updated_at"]
+            return series
+        except Exception as e:
+            logger.error(f"Error loading price history for {symbol}: {str(e)}")
+            return None
+
+    def _save(self, symbol: str, series: Dict[str, np.ndarray], updated_at: float) -> None:
+        """Write a new generation of the symbol's columns and point CURRENT at it; caller holds the lock."""
+        symbol_dir = self._symbol_dir(symbol)
+        generation = f"g{time.time_ns():x}"
+        os.makedirs(os.path.join(symbol_dir, generation))
+        for name, values in series.items():
+            np.save(os.path.join(symbol_dir, generation, f"{name}.npy"), values)
+        pointer = os.path.join(symbol_dir, "CURRENT")
+        with open(pointer + ".tmp", "w") as f:
+            json.dump({"generation": generation, "updated_at": updated_at}, f)
+        os.replace(pointer + ".tmp", pointer)
+        # Older generations can go; open memory maps of them stay valid until closed
+        for entry in os.listdir(symbol_dir):
+            if entry.startswith("g") and entry != generation:
+                shutil.rmtree(os.path.join(symbol_dir, entry), ignore_errors=True)
+
+    def append(self, symbol: str, dates: np.ndarray, columns: Dict[str, np.ndarray]) -> int:
+        """Merge bars into a symbol's history (new values win on duplicate dates); returns the number of new dates."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if not len(dates):
+            return 0
+        incoming = {name: np.asarray(columns.get(name, np.full(len(dates), np.nan)), dtype=np.float64)
+                    for name in COLUMNS}
+        with self._lock:
+            existing = self._series.get(symbol)
+            if existing is None and self.root:
+                existing = self._load(symbol)
+            if existing is None:
+                added = len(np.unique(dates))
+                merged_dates, merged = dates, incoming
+            else:
+                added = len(np.setdiff1d(dates, existing["date"]))
+                merged_dates = np.concatenate([existing["date"], dates])
+                merged = {name: np.concatenate([existing[name], incoming[name]]) for name in COLUMNS}
+            # Keep the last occurrence of each date, in date order
+            reversed_dates = merged_dates[::-1]
+            unique_dates, first_in_reversed = np.unique(reversed_dates, return_index=True)
+            keep = len(merged_dates) - 1 - first_in_reversed
+            series = {"date": unique_dates}
+            series.update({name: merged[name][keep] for name in COLUMNS})
+            updated_at = time.time()
+            self._series[symbol] = series
+            self._updated_at[symbol] = updated_at
+            if self.root:
+                try:
+                    self._save(symbol, series, updated_at)
+                except Exception as e:
+                    logger.error(f"Error saving price history for {symbol}: {str(e)}")
+            return added
+
+    def get(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return the symbol's columns ("date" plus OHLCV), or None if nothing is stored."""
+        with self._lock:
+            series = self._series.get(symbol)
+            if series is None and self.root:
+                series = self._load(symbol)
+            return series
+
+    def last_date(self, symbol: str) -> Optional[np.datetime64]:
+        series = self.get(symbol)
+        return series["date"][-1] if series is not None and len(series["date"]) else None
+
+    def updated_at(self, symbol: str) -> Optional[float]:
+        """Unix time of the last append for symbol, or None if it has never been stored."""
+        if self.get(symbol) is None:
+            return None
+        with self._lock:
+            return self._updated_at.get(symbol)
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._series)
+
+    def aligned_closes(self, symbols: List[str], window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Closes for the dates all symbols share, last `window` of them; returns (dates, matrix[dates, symbols])."""
+        series = [self.get(s) for s in symbols]
+        if not symbols or any(s is None for s in series):
+            return np.array([], dtype="datetime64[D]"), np.empty((0, len(symbols)))
+        common = series[0]["date"]
+        for s in series[1:]:
+            common = np.intersect1d(common, s["date"], assume_unique=True)
+        common = common[-window:]
+        matrix = np.column_stack([s["close"][np.searchsorted(s["date"], common)] for s in series])
+        return common, matrix
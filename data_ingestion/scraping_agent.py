@@ -1,20 +1,200 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from utils.cache import TTLCache
+from utils.tracing import tracer
+import itertools
 import logging
+import re
+import threading
+
+# Faster parsers are optional; BeautifulSoup's html.parser remains the fallback
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+META_CHARSET = re.compile(rb"<meta[^>]+charset", re.IGNORECASE)
+
 class ScrapingAgent:
+    def __init__(self, connect_timeout: float = 5.0, read_timeout: float = 15.0, cache_ttl: float = 300.0,
+                 max_per_host: int = 4, max_workers: int = 8, max_bytes: int = 2_000_000,
+                 max_paragraphs: int = 400):
+        # One pooled keep-alive session for every request made by this agent
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        # Streaming extraction stops once either budget is reached
+        self.max_bytes = max_bytes
+        self.max_paragraphs = max_paragraphs
+        # Fresh results are served without a request; after that, validators allow a conditional GET
+        self.response_cache = TTLCache(maxsize=256, ttl=cache_ttl)
+        self.validator_cache = TTLCache(maxsize=1024, ttl=24 * 3600)
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scraper")
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    @staticmethod
+    def extract_text(html: str) -> str:
+        """Join the text of all paragraphs in an HTML document, using the fastest parser installed."""
+        if HTMLParser is not None:
+            return " ".join(node.text().strip() for node in HTMLParser(html).css("p"))
+        if lxml_html is not None and html.strip():
+            return " ".join("".join(p.itertext()).strip() for p in lxml_html.fromstring(html).iter("p"))
+        soup = BeautifulSoup(html, "html.parser")
+        paragraphs = soup.find_all("p")
+        return " ".join(p.get_text().strip() for p in paragraphs)
+
+    @staticmethod
+    def extract_stream(chunks: Iterable[bytes], max_bytes: int = 0, max_paragraphs: int = 0,
+                       encoding: Optional[str] = None) -> str:
+        """Extract paragraph text incrementally as chunks arrive, stopping early at either budget (0 = unlimited).
+
+        Requires lxml. Every element outside a paragraph is dropped from the tree once parsed, and
+        a paragraph once its text is read, so the tree holds little more than the open elements.
+        Without an encoding, lxml relies on the page's <meta charset>.
+        """
+        options = {"encoding": encoding} if encoding else {}
+        parser = etree.HTMLPullParser(events=("start", "end"), **options)
+        paragraphs = []
+        open_paragraphs = 0
+
+        def drain() -> bool:
+            """Collect finished paragraphs and discard what has been read; True once max_paragraphs is reached."""
+            nonlocal open_paragraphs
+            for event, element in parser.read_events():
+                if element.tag == "p":
+                    if event == "start":
+                        open_paragraphs += 1
+                        continue
+                    open_paragraphs -= 1
+                    paragraphs.append("".join(element.itertext()).strip())
+                    if max_paragraphs and len(paragraphs) >= max_paragraphs:
+                        return True
+                elif event == "start" or open_paragraphs:
+                    # Inline elements stay until their paragraph's text has been read
+                    continue
+                element.clear()
+                # Earlier siblings have been processed already
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+            return False
+
+        received = 0
+        for chunk in chunks:
+            received += len(chunk)
+            parser.feed(chunk)
+            if drain() or (max_bytes and received >= max_bytes):
+                return " ".join(paragraphs)
+        parser.close()
+        drain()
+        return " ".join(paragraphs)
+
+    @staticmethod
+    def _encoding(response: requests.Response, head: bytes) -> Optional[str]:
+        """Charset of the body: the Content-Type header's, else None when the page declares one
+        in <meta> (lxml reads it), else detected from the first chunk."""
+        if "charset" in response.headers.get("Content-Type", "").lower():
+            return response.encoding
+        if META_CHARSET.search(head):
+            return None
+        # requests would assume ISO-8859-1 for text/html without a charset, which garbles UTF-8 pages
+        return requests.compat.chardet.detect(head)["encoding"] or "utf-8"
+
+    def _fetch(self, url: str) -> Tuple[str, bool]:
+        """Fetch and extract url, revalidating a stale copy if one exists; returns (text, revalidated)."""
+        headers = {}
+        stale = self.validator_cache.get(url)
+        if stale:
+            if stale["etag"]:
+                headers["If-None-Match"] = stale["etag"]
+            if stale["last_modified"]:
+                headers["If-Modified-Since"] = stale["last_modified"]
+        tracer.count("external_calls_total", service="http", host=urlsplit(url).netloc)
+        with self._host_slot(url):
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and stale:
+                    return stale["text"], True
+                response.raise_for_status()
+                received = [0]
+
+                def counted(chunks):
+                    for chunk in chunks:
+                        received[0] += len(chunk)
+                        yield chunk
+
+                if etree is not None:
+                    chunks = counted(response.iter_content(chunk_size=16384))
+                    head = next(chunks, b"")
+                    text = self.extract_stream(itertools.chain([head], chunks), self.max_bytes,
+                                               self.max_paragraphs, encoding=self._encoding(response, head))
+                else:
+                    received[0] = len(response.content)
+                    response.encoding = self._encoding(response, response.content[:16384]) or response.apparent_encoding
+                    text = self.extract_text(response.text)
+                tracer.observe_size("payload_bytes", received[0], service="http")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.validator_cache.set(url, {"etag": etag, "last_modified": last_modified, "text": text})
+        return text, False
+
+    @tracer.traced("scraping_agent.scrape_filings")
     def scrape_filings(self, url: str) -> str:
         """Scrape text content from a financial news URL."""
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            paragraphs = soup.find_all("p")
-            return " ".join(p.get_text().strip() for p in paragraphs)
+            cached = self.response_cache.get(url)
+            tracer.count("cache_requests_total", cache="scrape", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+            text, revalidated = self._fetch(url)
+            self.response_cache.set(url, text)
+            logger.info(f"Scraped {url} ({len(text)} chars{', not modified' if revalidated else ''})")
+            return text
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
-            return ""
\ No newline at end of file
+            return ""
+
+    def scrape_many(self, urls: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Scrape several URLs concurrently, at most max_per_host requests per host at a time.
+
+        With a timeout (seconds) the call returns by then, keeping every page that finished;
+        late pages are cancelled (or left to finish into the cache) and come back empty.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        futures = [self.executor.submit(tracer.propagate(self.scrape_filings), url) for url in unique_urls]
+        _, pending = wait(futures, timeout=max(0.0, timeout) if timeout is not None else None)
+        if pending:
+            logger.warning(f"Scraping timed out after {timeout:.0f}s with {len(pending)} of {len(futures)} pages left")
+        pages = {}
+        for url, future in zip(unique_urls, futures):
+            if future in pending:
+                future.cancel()
+                pages[url] = ""
+            else:
+                pages[url] = future.result()
+        return pages
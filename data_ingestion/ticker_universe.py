@@ -0,0 +1,160 @@
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tickers.csv")
+
+# 2-5 uppercase letters, optionally followed by numbers and/or a dot with 1-2 letters
+SYMBOL_PATTERN = re.compile(r'\b[A-Z]{2,5}(?:[0-9]+)?(?:\.[A-Z]{1,2})?\b')
+
+# Uppercase words that look like tickers but are not worth a network lookup
+NON_TICKERS = frozenset({
+    "AI", "API", "AUM", "CEO", "CFO", "COO", "CPI", "CTO", "EOD", "EPS", "ESG", "ETF", "EU", "EUR", "FED",
+    "FX", "FY", "GDP", "IPO", "IT", "LLC", "NYSE", "OK", "PE", "PM", "QE", "ROI", "SEC", "TODAY", "UK",
+    "US", "USA", "USD", "VAR", "WHAT", "YOY", "YTD",
+})
+
+class AhoCorasick:
+    """Multi-pattern string matcher that finds every occurrence of every pattern in one pass."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._out[node].append(pattern_id)
+        # Breadth-first construction of failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return (start, end, pattern_id) for every match in text."""
+        matches = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern_id in self._out[node]:
+                matches.append((position + 1 - len(self.patterns[pattern_id]), position + 1, pattern_id))
+        return matches
+
+
+class TickerUniverse:
+    """Known tickers and company names loaded from a local CSV (symbol,names with names separated by "|").
+
+    Symbols must appear exactly (case-sensitive) in a query; names match case-insensitively but
+    must start with a capital letter, so "Arm" matches while "arm" does not. The file is reloaded
+    when its modification time changes, checked at most every refresh_interval seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_interval: float = 60.0):
+        self.path = path or os.getenv("TICKER_UNIVERSE_PATH") or DEFAULT_PATH
+        self.refresh_interval = refresh_interval
+        self.symbols: FrozenSet[str] = frozenset()
+        self._targets: List[Tuple[str, bool]] = []
+        self._matcher = AhoCorasick([])
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the ticker file if it changed; returns True if a reload happened."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+            if not force and mtime == self._mtime:
+                return False
+            symbols, patterns, targets = set(), [], []
+            with open(self.path, newline="") as f:
+                for row in csv.DictReader(f):
+                    symbol = (row.get("symbol") or "").strip()
+                    if not symbol:
+                        continue
+                    symbols.add(symbol)
+                    patterns.append(symbol.lower())
+                    targets.append((symbol, True))
+                    for name in (row.get("names") or "").split("|"):
+                        if name.strip():
+                            patterns.append(name.strip().lower())
+                            targets.append((symbol, False))
+            matcher = AhoCorasick(patterns)
+            with self._lock:
+                self.symbols, self._targets, self._matcher, self._mtime = frozenset(symbols), targets, matcher, mtime
+            logger.info(f"Loaded {len(symbols)} tickers from {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading ticker universe from {self.path}: {str(e)}")
+            return False
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    def match(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, symbol) for known symbols and company names in text, leftmost-longest, in order."""
+        self.refresh()
+        with self._lock:
+            matcher, targets = self._matcher, self._targets
+        candidates = []
+        for start, end, pattern_id in matcher.find(text.lower()):
+            if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                continue
+            symbol, is_symbol = targets[pattern_id]
+            if is_symbol and text[start:end] != symbol:
+                continue
+            if not is_symbol and not text[start].isupper():
+                continue
+            candidates.append((start, end, symbol))
+        # Prefer the longest match at each position and drop overlaps
+        candidates.sort(key=lambda m: (m[0], -m[1]))
+        matches, covered = [], -1
+        for start, end, symbol in candidates:
+            if start >= covered:
+                matches.append((start, end, symbol))
+                covered = end
+        return matches
+
+    def unknown_candidates(self, text: str, known: List[Tuple[int, int, str]]) -> List[Tuple[int, str]]:
+        """Return (position, candidate) for ticker-like words outside the universe that need a network check.
+
+        Words inside a span already matched by match() (e.g. "TSMC", or "SK" in "SK Hynix") and
+        common non-ticker abbreviations are skipped.
+        """
+        candidates = []
+        for m in SYMBOL_PATTERN.finditer(text):
+            if m.group() in self.symbols or m.group() in NON_TICKERS:
+                continue
+            if any(start < m.end() and m.start() < end for start, end, _ in known):
+                continue
+            candidates.append((m.start(), m.group()))
+        return candidates
@@ -1,50 +1,105 @@
 from data_ingestion.api_agent import APIAgent
 from data_ingestion.scraping_agent import ScrapingAgent
 from data_ingestion.document_loader import DocumentLoader
+from data_ingestion.ticker_universe import TickerUniverse
 from agents.retriever_agent import RetrieverAgent
 from agents.analysis_agent import AnalysisAgent
 from agents.language_agent import LanguageAgent
+from agents.risk_agent import RiskAgent
+from agents.model_registry import peak_rss_mb
+from utils.pipeline import Pipeline, Stage
+from utils.tracing import tracer
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import re
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class Orchestrator:
+    # Per-stage timeouts (seconds) for a single query; batches scale them by waves of work
+    STAGE_TIMEOUTS = {"fetch": 45, "news": 15, "index": 30, "context": 10, "analysis": 5, "risk": 5}
+    # Briefs per wave for the stages whose work grows with the number of briefs
+    BRIEFS_PER_WAVE = 8
+    # The fetch and news fan-outs return this long before their stage times out, so finished work is kept
+    DEADLINE_MARGIN = 2
+    ERROR_RESPONSE = "- **Error**: An error occurred while processing your request. Please try again."
+
     def __init__(self):
         self.api_agent = APIAgent()
+        self.ticker_universe = TickerUniverse()
         self.scraping_agent = ScrapingAgent()
         self.document_loader = DocumentLoader()
         self.retriever_agent = RetrieverAgent()
         self.analysis_agent = AnalysisAgent()
         self.language_agent = LanguageAgent()
+        # Risk metrics reuse the price history cached by the API agent, so they cost no extra network calls
+        self.risk_agent = RiskAgent(self.api_agent.history_store)
+        # Runs independent query stages concurrently; separate from the API agent's fetch pool
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="orchestrator")
+        self.last_stage_timings: Dict[str, float] = {}
+        self.last_batch_stats: Dict[str, float] = {}
+        self.last_degraded_stages: List[str] = []
 
-    def extract_symbols(self, text: str) -> list:
-        """Extract and validate stock symbols from text."""
-        # Regex to match stock symbols: 2-5 uppercase letters, optionally followed by numbers and/or a dot with 1-2 letters
-        pattern = r'\b[A-Z]{2,5}(?:[0-9]+)?(?:\.[A-Z]{1,2})?\b'
-        potential_symbols = re.findall(pattern, text)
-        if not potential_symbols:
+    def warmup(self, language_model: bool = False) -> dict:
+        """Load models ahead of the first query and report per-model load time and peak RSS.
+
+        The language model is optional since process_query does not use it.
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.retriever_agent.warmup()
+        timings["retriever_seconds"] = time.perf_counter() - start
+        if language_model:
+            start = time.perf_counter()
+            self.language_agent.warmup()
+            timings["language_seconds"] = time.perf_counter() - start
+        timings["peak_rss_mb"] = peak_rss_mb()
+        logger.info(f"Warmup complete: {timings}")
+        return timings
+
+    def _match_symbols(self, text: str) -> Tuple[List[Tuple[int, int, str]], List[Tuple[int, str]]]:
+        """Split text into known matches (start, end, symbol) and unknown ticker candidates (start, symbol)."""
+        # Known tickers and company names are matched locally in one pass
+        known = self.ticker_universe.match(text)
+        self.api_agent.mark_valid([symbol for _, _, symbol in known])
+        # Remaining ticker-like words, except those inside a known name or symbol
+        return known, self.ticker_universe.unknown_candidates(text, known)
+
+    @staticmethod
+    def _resolve_symbols(known: List[Tuple[int, int, str]], unknown: List[Tuple[int, str]],
+                         validated: Set[str]) -> List[str]:
+        """Order known matches and validated candidates by position; defaults to TSM when none remain."""
+        if not known and not unknown:
             logger.info("No symbols found, using default symbol TSM")
             return ["TSM"]
-
-        # Validate symbols
-        valid_symbols = []
-        for symbol in potential_symbols:
-            if self.api_agent.validate_symbol(symbol):
-                valid_symbols.append(symbol)
-            else:
-                logger.warning(f"Symbol {symbol} is invalid and will be skipped")
+        for symbol in {symbol for _, symbol in unknown} - validated:
+            logger.warning(f"Symbol {symbol} is invalid and will be skipped")
+        matches = sorted([(start, symbol) for start, _, symbol in known]
+                         + [(position, symbol) for position, symbol in unknown if symbol in validated])
+        valid_symbols = list(dict.fromkeys(symbol for _, symbol in matches))
 
         if not valid_symbols:
             logger.info("No valid symbols found, using default symbol TSM")
             return ["TSM"]
 
         logger.info(f"Valid symbols extracted: {valid_symbols}")
-        return list(set(valid_symbols))
+        return valid_symbols
+
+    @tracer.traced("orchestrator.extract_symbols")
+    def extract_symbols(self, text: str) -> list:
+        """Extract and validate stock symbols from text."""
+        known, unknown = self._match_symbols(text)
+        # Only candidates outside the universe need a (cached) network check
+        potential_symbols = [symbol for _, symbol in unknown]
+        validated = set(self.api_agent.validate_symbols(potential_symbols)) if potential_symbols else set()
+        return self._resolve_symbols(known, unknown, validated)
 
-    def generate_prediction(self, market_data: dict, earnings_surprises: dict, symbols: list) -> str:
-        """Generate a dynamic prediction using market data, earnings, and sector."""
+    def generate_prediction(self, market_data: dict, earnings_surprises: dict, symbols: list,
+                            risk: Optional[dict] = None) -> str:
+        """Generate a dynamic prediction using market data, earnings, sector and, when available, risk metrics."""
+        risk_by_symbol = (risk or {}).get("symbols", {})
         predictions = []
         for symbol in symbols:
             price = market_data.get(symbol, {}).get('price', 0)
@@ -73,11 +128,19 @@ class Orchestrator:
                 predictions.append(f"{symbol} ({sector}, {cap_category}) may see limited movement due to low trading volume")
             else:
                 predictions.append(f"{symbol} ({sector}, {cap_category}) is likely to remain stable with an earnings surprise of {earnings_surprise:.2f}%")
+
+            # Qualify with realized risk from price history
+            metrics = risk_by_symbol.get(symbol)
+            if metrics:
+                predictions[-1] += (f" (volatility {metrics['volatility'] * 100:.1f}% annualized, "
+                                    f"{self.risk_agent.confidence:.0%} 1-day VaR {metrics['var'] * 100:.1f}%, "
+                                    f"max drawdown {metrics['max_drawdown'] * 100:.1f}%)")
         logger.info(f"Generated predictions: {predictions}")
         return "; ".join(predictions) + "."
 
-    def generate_strategy(self, exposure: float, context: str, market_data: dict, symbols: list) -> str:
-        """Generate a dynamic strategy using exposure, context, and market data."""
+    def generate_strategy(self, exposure: float, context: str, market_data: dict, symbols: list,
+                          risk: Optional[dict] = None) -> str:
+        """Generate a dynamic strategy using exposure, context, market data and, when available, risk metrics."""
         strategies = []
         avg_price = sum(market_data.get(s, {}).get('price', 0) for s in symbols) / len(symbols) if symbols else 0
         sectors = set(market_data.get(s, {}).get('sector', 'Unknown') for s in symbols)
@@ -117,6 +180,17 @@ class Orchestrator:
         elif avg_price < 30:
             strategies.append("Explore undervaluation opportunities")
 
+        # Risk-based strategy
+        risk_by_symbol = (risk or {}).get("symbols", {})
+        volatile = [s for s in symbols if risk_by_symbol.get(s, {}).get("volatility", 0) > 0.5]
+        if volatile:
+            strategies.append(f"Size positions conservatively given elevated volatility in {', '.join(volatile)}")
+        if any(risk_by_symbol.get(s, {}).get("max_drawdown", 0) > 0.2 for s in symbols):
+            strategies.append("Review stop-loss levels after drawdowns above 20%")
+        avg_correlation = (risk or {}).get("avg_correlation")
+        if avg_correlation is not None and avg_correlation > 0.8:
+            strategies.append("Holdings are highly correlated; add uncorrelated assets to improve diversification")
+
         # Context-based strategy
         if "china" in context.lower() or "geopolitical" in context.lower():
             strategies.append("Hedge against geopolitical uncertainties")
@@ -130,71 +204,212 @@ class Orchestrator:
         logger.info(f"Generated strategies: {strategies}")
         return "; ".join(strategies) + "."
 
-    def process_query(self, query: str) -> str:
-        """Process a text query and return a bullet-point narrative response. Workaround V1"""
+    def _prepare_query(self, query: str, symbols: List[str]) -> Optional[Tuple[List[str], str]]:
+        """Strip a query's extracted symbols out of it; returns None if no symbols were found."""
+        if not symbols:
+            return None
+
+        # Clean query by removing symbols (for better context retrieval)
+        cleaned_query = query
+        for symbol in symbols:
+            cleaned_query = cleaned_query.replace(symbol, "").replace("  ", " ").strip()
+        if not cleaned_query:
+            cleaned_query = "Provide a market brief."
+        return symbols, cleaned_query
+
+    @staticmethod
+    def _format_age(seconds: float) -> str:
+        if seconds < 60:
+            return "just now"
+        if seconds < 3600:
+            return f"{seconds / 60:.0f} min ago"
+        return f"{seconds / 3600:.1f} h ago"
+
+    def _render_brief(self, valid_symbols: List[str], market_data: dict, exposure: float,
+                      earnings_surprises: dict, context: str, risk: dict) -> str:
+        """Build the bullet-point response for one portfolio from already computed results."""
+        portfolio_weights = {symbol: 1000000 for symbol in valid_symbols}
+
+        # Generate dynamic prediction and strategy
+        prediction = self.generate_prediction(market_data, earnings_surprises, valid_symbols, risk)
+        strategy = self.generate_strategy(exposure, context, market_data, valid_symbols, risk)
+
+        # Build bullet-point response
+        bullet_points = [
+            f"- **Portfolio Exposure**: {exposure:.2f}% of AUM ({', '.join([f'{s}: ${portfolio_weights[s]:,.0f}' for s in valid_symbols])})."
+        ]
+        for symbol in valid_symbols:
+            age = market_data.get(symbol, {}).get("age_seconds")
+            bullet_points.append(
+                f"- **{symbol}**: Price ${market_data.get(symbol, {}).get('price', 0):.2f}"
+                f"{f' (as of {self._format_age(age)})' if age is not None else ''}, "
+                f"Earnings Surprise {earnings_surprises.get(symbol, 0):.2f}%."
+            )
+        bullet_points.extend([
+            f"- **Market Context**: {context[:200]}..." if len(context) > 200 else f"- **Market Context**: {context}.",
+            f"- **Prediction**: {prediction}",
+            f"- **Business Strategy**: {strategy}"
+        ])
+        response = "\n".join(bullet_points)
+        logger.info(f"Generated response ({len(response)} chars)")
+        logger.debug(f"Generated response: {response}")
+        return response
+
+    def process_query(self, query: str, progress: Optional[Callable[[str], None]] = None) -> str:
+        """Process a text query and return a bullet-point narrative response. Workaround V1
+
+        If given, progress is called with a short status line as each stage completes.
+        """
+        return self.process_query_checked(query, progress=progress)[0]
+
+    def process_query_checked(self, query: str,
+                              progress: Optional[Callable[[str], None]] = None) -> Tuple[str, bool]:
+        """Like process_query, but returns (response, complete).
+
+        complete is False when the response is the error brief or a pipeline stage degraded to its
+        fallback, so callers know not to cache it.
+        """
+        responses, complete = self._run_batch([query], progress)
+        return responses[0], complete
+
+    def process_batch(self, queries: List[str], progress: Optional[Callable[[str], None]] = None,
+                      stage_timeouts: Optional[Dict[str, float]] = None) -> List[str]:
+        """Process many queries at once, returning one bullet-point response per query in order.
+
+        Market data, earnings and news are fetched once per unique symbol across all queries, and
+        retrieval for every query runs as a single batched embedding and search. Stage timeouts
+        grow with the batch (see _stage_timeouts); stage_timeouts overrides them per stage.
+        """
+        return self._run_batch(queries, progress, stage_timeouts)[0]
+
+    def _stage_timeouts(self, num_symbols: int, num_pages: int, num_briefs: int,
+                        overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """STAGE_TIMEOUTS scaled to a batch: each stage gets its single-query budget once per wave.
+
+        A wave is what the stage can run at once: max_workers API calls (two per symbol),
+        max_per_host news pages, or BRIEFS_PER_WAVE briefs, so a query of up to
+        four symbols gets STAGE_TIMEOUTS as is.
+        """
+        def waves(count: int, width: int) -> int:
+            return max(1, -(-count // width))
+
+        page_waves = waves(num_pages, self.scraping_agent.max_per_host)
+        scale = {"fetch": waves(2 * num_symbols, self.api_agent.max_workers), "news": page_waves, "index": page_waves}
+        brief_waves = waves(num_briefs, self.BRIEFS_PER_WAVE)
+        timeouts = {name: timeout * scale.get(name, brief_waves) for name, timeout in self.STAGE_TIMEOUTS.items()}
+        timeouts.update(overrides or {})
+        return timeouts
+
+    @tracer.traced("orchestrator.process_batch")
+    def _run_batch(self, queries: List[str], progress: Optional[Callable[[str], None]],
+                   stage_timeouts: Optional[Dict[str, float]] = None) -> Tuple[List[str], bool]:
+        """Shared body of process_batch; also returns whether every stage completed without error."""
+        def report(message: str) -> None:
+            if progress:
+                try:
+                    progress(message)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {str(e)}")
+
+        start = time.perf_counter()
+        responses: List[Optional[str]] = [None] * len(queries)
+        complete = True
+        self.last_degraded_stages = []
         try:
-            if not query:
-                return "No query provided."
-
-            # Extract symbols from query
-            symbols = self.extract_symbols(query)
-            if not symbols:
-                return "No symbols provided."
-
-            # Clean query by removing symbols (for better context retrieval)
-            cleaned_query = query
-            for symbol in symbols:
-                cleaned_query = cleaned_query.replace(symbol, "").replace("  ", " ").strip()
-            if not cleaned_query:
-                cleaned_query = "Provide a market brief."
-
-            # Use provided symbols
-            valid_symbols = symbols
-            logger.info(f"Processing symbols: {valid_symbols}")
-
-            # Fetch market data
-            market_data = self.api_agent.get_market_data(valid_symbols)
-            earnings = {symbol: self.api_agent.get_earnings(symbol) for symbol in valid_symbols}
-
-            # Scrape news for first valid symbol
-            news_url = f"https://finance.yahoo.com/quote/{valid_symbols[0]}/news/"
-            news_text = self.scraping_agent.scrape_filings(news_url)
-            documents = self.document_loader.load_and_split(news_text)
-            self.retriever_agent.index_documents(documents)
-
-            # Retrieve relevant context
-            retrieved_docs = self.retriever_agent.retrieve(cleaned_query, k=5)
-            if not retrieved_docs:
-                context = "No relevant news found."
-            else:
-                context = " ".join([doc.page_content for doc in retrieved_docs])
-
-            # Analyze portfolio
-            portfolio_weights = {symbol: 1000000 for symbol in valid_symbols}
-            exposure = self.analysis_agent.analyze_portfolio(market_data, portfolio_weights)
-            earnings_surprises = {symbol: self.analysis_agent.analyze_earnings(earnings, symbol) for symbol in valid_symbols}
-
-            # Generate dynamic prediction and strategy
-            prediction = self.generate_prediction(market_data, earnings_surprises, valid_symbols)
-            strategy = self.generate_strategy(exposure, context, market_data, valid_symbols)
-
-            # Build bullet-point response
-            bullet_points = [
-                f"- **Portfolio Exposure**: {exposure:.2f}% of AUM ({', '.join([f'{s}: ${portfolio_weights[s]:,.0f}' for s in valid_symbols])})."
-            ]
-            for symbol in valid_symbols:
-                bullet_points.append(
-                    f"- **{symbol}**: Price ${market_data.get(symbol, {}).get('price', 0):.2f}, "
-                    f"Earnings Surprise {earnings_surprises.get(symbol, 0):.2f}%."
-                )
-            bullet_points.extend([
-                f"- **Market Context**: {context[:200]}..." if len(context) > 200 else f"- **Market Context**: {context}.",
-                f"- **Prediction**: {prediction}",
-                f"- **Business Strategy**: {strategy}"
-            ])
-            response = "\n".join(bullet_points)
-            logger.info(f"Generated response: {response}")
-            return response
+            matched = {}
+            for position, query in enumerate(queries):
+                if not query:
+                    responses[position] = "No query provided."
+                    continue
+                matched[position] = self._match_symbols(query)
+            # Candidates outside the universe are validated for all queries in one fan-out
+            candidates = [symbol for _, unknown in matched.values() for _, symbol in unknown]
+            validated = set(self.api_agent.validate_symbols(candidates)) if candidates else set()
+
+            briefs = []
+            for position, (known, unknown) in matched.items():
+                prepared = self._prepare_query(queries[position], self._resolve_symbols(known, unknown, validated))
+                if prepared is None:
+                    responses[position] = "No symbols provided."
+                    continue
+                briefs.append((position,) + prepared)
+
+            if briefs:
+                all_symbols = list(dict.fromkeys(s for _, symbols, _ in briefs for s in symbols))
+                # News is scraped for the first valid symbol of each query
+                news_symbols = [symbols[0] for _, symbols, _ in briefs]
+                timeouts = self._stage_timeouts(len(all_symbols), len(set(news_symbols)), len(briefs), stage_timeouts)
+                logger.info(f"Processing {len(briefs)} queries over symbols: {all_symbols}")
+                report(f"Symbols: {', '.join(all_symbols)}")
+
+                def fetch():
+                    # Market data and earnings for all symbols, fetched concurrently; late symbols are
+                    # defaulted by the fan-out itself rather than losing everything to the stage timeout
+                    return self.api_agent.fetch_all(all_symbols, timeout=timeouts["fetch"] - self.DEADLINE_MARGIN)
+
+                def news():
+                    # Likewise pages that arrived in time are indexed even if others are still loading
+                    urls = {s: f"https://finance.yahoo.com/quote/{s}/news/" for s in dict.fromkeys(news_symbols)}
+                    pages = self.scraping_agent.scrape_many(list(urls.values()),
+                                                            timeout=timeouts["news"] - self.DEADLINE_MARGIN)
+                    return {s: pages.get(url, "") for s, url in urls.items()}
+
+                def index(news):
+                    # Chunks are embedded in batches while the splitter is still producing them
+                    for symbol, text in news.items():
+                        self.retriever_agent.index_documents(self.document_loader.iter_chunks(text), symbol=symbol)
+
+                def context(index):
+                    retrieved = self.retriever_agent.retrieve_many(
+                        [cleaned_query for _, _, cleaned_query in briefs], k=5, symbol=news_symbols
+                    )
+                    return [" ".join(doc.page_content for doc, _ in hits) if hits else "No relevant news found."
+                            for hits in retrieved]
+
+                def analysis(fetch):
+                    market_data, earnings = fetch
+                    results = []
+                    for _, symbols, _ in briefs:
+                        summary = self.analysis_agent.analyze(market_data, {s: 1000000 for s in symbols}, earnings)
+                        results.append((summary["exposure"], summary["earnings_surprise"]))
+                    return results
+
+                def risk(fetch):
+                    portfolios = {tuple(symbols) for _, symbols, _ in briefs}
+                    return {portfolio: self.risk_agent.portfolio_risk(list(portfolio)) for portfolio in portfolios}
+
+                # API fetches and the news branch are independent and run concurrently
+                result = Pipeline([
+                    Stage("fetch", fetch, timeout=timeouts["fetch"], fallback=lambda: ({}, {})),
+                    Stage("news", news, timeout=timeouts["news"], fallback=dict),
+                    Stage("index", index, deps=["news"], timeout=timeouts["index"]),
+                    Stage("context", context, deps=["index"], timeout=timeouts["context"],
+                          fallback=lambda: ["No relevant news found."] * len(briefs)),
+                    Stage("analysis", analysis, deps=["fetch"], timeout=timeouts["analysis"],
+                          fallback=lambda: [(0.0, {})] * len(briefs)),
+                    Stage("risk", risk, deps=["fetch"], timeout=timeouts["risk"], fallback=dict),
+                ]).run(self.executor, progress=report)
+                self.last_stage_timings = dict(result.timings, total=result.total)
+                self.last_degraded_stages = list(result.degraded)
+                complete = not result.degraded
+                market_data, _ = result["fetch"]
+
+                for (position, symbols, _), context_text, (exposure, earnings_surprises) in zip(
+                        briefs, result["context"], result["analysis"]):
+                    responses[position] = self._render_brief(symbols, market_data, exposure, earnings_surprises,
+                                                             context_text, result["risk"].get(tuple(symbols), {}))
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
-            return "- **Error**: An error occurred while processing your request. Please try again."
+            responses = [response if response is not None else self.ERROR_RESPONSE for response in responses]
+            complete = False
+
+        elapsed = time.perf_counter() - start
+        self.last_batch_stats = {
+            "briefs": len(queries),
+            "seconds": elapsed,
+            "briefs_per_minute": len(queries) / elapsed * 60 if elapsed > 0 else 0.0,
+        }
+        if len(queries) > 1:
+            logger.info(f"Generated {len(queries)} briefs in {elapsed:.2f}s "
+                        f"({self.last_batch_stats['briefs_per_minute']:.1f} briefs/min)")
+        return responses, complete
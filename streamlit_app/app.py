@@ -2,8 +2,11 @@ import logging
 import streamlit as st
 import sys
 import os
-import tempfile
-from gtts import gTTS
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 # Add root and subdirectories to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,28 +15,95 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../agents')))
 
 from orchestrator import Orchestrator
+from audio_utils import AudioSynthesizer
+from utils.cache import TTLCache
+from utils.tracing import tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_audio(text: str, output_path: str) -> bool:
-    """Generate audio from text using gTTS."""
-    try:
-        clean_text = text.replace('- **', '').replace('**:', ':').replace('\n', '. ')
-        tts = gTTS(text=clean_text, lang='en', slow=False)
-        tts.save(output_path)
-        logger.info(f"Audio generated and saved to {output_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Error generating audio: {str(e)}")
-        return False
+RESULT_TTL_SECONDS = 60
+
+# Shared across reruns and sessions: one warm orchestrator, one worker pool, one result memo
+@st.cache_resource
+def get_orchestrator() -> Orchestrator:
+    orchestrator = Orchestrator()
+    orchestrator.warmup()
+    return orchestrator
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="brief")
+
+@st.cache_resource
+def get_synthesizer() -> AudioSynthesizer:
+    # Sentence clips are cached across sessions, so repeated headers are synthesized once
+    return AudioSynthesizer()
+
+@st.cache_resource
+def get_query_state() -> Tuple[TTLCache, Dict[str, Tuple[Future, "queue.Queue[str]"]], threading.Lock]:
+    return TTLCache(maxsize=256, ttl=RESULT_TTL_SECONDS), {}, threading.Lock()
 
-# Initialize orchestrator
-orchestrator = Orchestrator()
+def show_debug_panel(spans: List[dict]) -> None:
+    """Stage timings and spans of this session's request, and the process-wide metrics."""
+    with st.expander("Debug: timings and trace"):
+        timings = {s["name"][len("stage."):]: s["duration_ms"] / 1000 for s in spans if s["name"].startswith("stage.")}
+        if spans:
+            timings["total"] = spans[0]["duration_ms"] / 1000
+        st.json(timings)
+        if spans:
+            st.dataframe([{"span": s["name"], "duration_ms": round(s["duration_ms"], 1),
+                           "parent": s["parent_id"], "error": s["error"]} for s in spans])
+        st.download_button("Download metrics (JSON)", tracer.export_json(), file_name="trace.json",
+                           mime="application/json")
+        st.code(tracer.export_prometheus(), language="text")
+
+def run_query(query: str, progress, traced: bool) -> Tuple[str, bool, Optional[int]]:
+    """Build a brief; returns (response, complete, trace_id), tracing only this run if traced."""
+    if not traced:
+        return get_orchestrator().process_query_checked(query, progress) + (None,)
+    with tracer.trace("app.query") as span:
+        response, complete = get_orchestrator().process_query_checked(query, progress)
+    return response, complete, span.trace_id
+
+def submit_query(query: str, traced: bool = False) -> Tuple[Future, "queue.Queue[str]"]:
+    """Run a query in the background, reusing a fresh cached result or an identical in-flight run.
+
+    The future resolves to (response, complete, trace_id); only complete briefs are memoized, so an
+    error or a degraded brief is retried on the next submit instead of being served until it expires.
+    A traced submit always runs the query itself, so its trace belongs to this session.
+    """
+    results, in_flight, lock = get_query_state()
+    with lock:
+        cached = None if traced else results.get(query)
+        if cached is not None:
+            future = Future()
+            future.set_result((cached, True, None))
+            return future, queue.Queue()
+        if query in in_flight and not traced:
+            return in_flight[query]
+        updates: "queue.Queue[str]" = queue.Queue()
+        future = get_executor().submit(run_query, query, updates.put, traced)
+        in_flight[query] = (future, updates)
+
+    def finish(done: Future) -> None:
+        with lock:
+            if in_flight.get(query, (None,))[0] is done:
+                in_flight.pop(query)
+            if done.exception() is None:
+                response, complete, _ = done.result()
+                if complete:
+                    results.set(query, response)
+
+    future.add_done_callback(finish)
+    return future, updates
 
 st.title("Morning Market Brief")
 st.markdown("Ask about your stock portfolio (include symbols in your query, e.g., 'What's the risk for TSM, NVDA today?')")
 
+# Per session: tracing covers this session's requests only
+traced = st.sidebar.checkbox("Enable tracing", value=tracer.enabled, key="tracing")
+
 # Single text input
 query = st.text_input("Enter your query with stock symbols", value="What's the risk for TSM, NVDA today?")
 
@@ -42,19 +112,34 @@ if st.button("Submit"):
         if not query:
             st.error("Please provide a query with stock symbols.")
         else:
-            # Process query directly (symbol extraction handled in orchestrator)
-            response = orchestrator.process_query(query)
-            logger.info(f"Generated response: {response}")
-            # Display response as markdown
+            # Process query in the background (symbol extraction handled in orchestrator)
+            future, updates = submit_query(query, traced=traced)
+            with st.status("Building your brief...", expanded=True) as status:
+                while True:
+                    done = future.done()
+                    while not updates.empty():
+                        status.write(updates.get_nowait())
+                    if done:
+                        break
+                    time.sleep(0.1)
+                response, _, trace_id = future.result()
+                status.update(label="Brief ready", state="complete", expanded=False)
+            logger.info(f"Generated response ({len(response)} chars)")
+            logger.debug(f"Generated response: {response}")
+            # Display response as markdown while audio is synthesized
             st.success("Response received!")
             st.markdown(response, unsafe_allow_html=True)
-            # Generate and play audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-                if generate_audio(response, temp_audio.name):
-                    st.audio(temp_audio.name, format="audio/mp3", start_time=0)
-                    os.remove(temp_audio.name)  # Clean up
-                else:
-                    st.warning("Failed to generate audio response.")
+            with st.spinner("Generating audio..."):
+                synthesizer = get_synthesizer()
+                audio, failed = synthesizer.synthesize(response)
+            if audio:
+                st.audio(audio, format=synthesizer.mime, start_time=0)
+                if failed:
+                    st.warning(f"{failed} sentence(s) could not be synthesized and are missing from the audio.")
+            else:
+                st.warning("Failed to generate audio response.")
+            if traced:
+                show_debug_panel(tracer.trace_spans(trace_id) if trace_id is not None else [])
     except Exception as e:
         logger.error(f"Error in Streamlit app: {str(e)}")
         st.error(f"An error occurred: {str(e)}. Please try again.")
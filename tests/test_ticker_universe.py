@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_ingestion.ticker_universe import TickerUniverse
+
+universe = TickerUniverse()
+
+
+def split(text):
+    known = universe.match(text)
+    return [symbol for _, _, symbol in known], [word for _, word in universe.unknown_candidates(text, known)]
+
+
+def test_company_name_containing_ticker_needs_no_lookup():
+    assert split("What about TSMC today?") == (["TSM"], [])
+
+
+def test_words_inside_matched_names_are_not_candidates():
+    assert split("Compare SK Hynix with KLA Corporation") == (["000660.KS", "KLAC"], [])
+
+
+def test_unknown_tickers_are_still_candidates():
+    assert split("What's the risk for TSM, NVDA and XYZW today?") == (["TSM", "NVDA"], ["XYZW"])
+
+
+def test_lowercase_words_do_not_match_names():
+    assert split("my arm hurts") == ([], [])
@@ -0,0 +1,33 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tracing import Tracer
+
+tracer = Tracer(enabled=False)
+
+
+@tracer.traced("work")
+def work():
+    tracer.count("work_total")
+
+
+def test_trace_records_only_its_own_request():
+    executor = ThreadPoolExecutor(max_workers=2)
+
+    def traced_request():
+        with tracer.trace("request") as span:
+            executor.submit(tracer.propagate(work)).result()
+        return span.trace_id
+
+    trace_id = executor.submit(traced_request).result()
+    # Untraced requests on the same threads stay unrecorded
+    executor.submit(work).result()
+    work()
+    executor.shutdown()
+
+    assert [s["name"] for s in tracer.trace_spans(trace_id)] == ["request", "work"]
+    assert "work_total 1\n" in tracer.export_prometheus()
+    assert not tracer.active
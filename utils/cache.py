@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, timer: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._timer():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entry when full."""
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self._timer()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+class SnapshotCache:
+    """Stale-while-revalidate cache of fetched snapshots, with per-call freshness windows.
+
+    get() returns (value, age_seconds). Within ttl the cached value is returned as is; within
+    ttl + max_stale it is still returned immediately while one background refresh replaces it;
+    beyond that (or when missing) the caller loads it. Concurrent loads of the same key are
+    coalesced into a single loader call. Failed loads are not cached.
+    """
+
+    def __init__(self, maxsize: int = 4096, max_workers: int = 4, timer: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot-refresh")
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], future: Future) -> None:
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            return
+        fetched_at = self._timer()
+        with self._lock:
+            self._store(key, value, fetched_at)
+            self._in_flight.pop(key, None)
+        future.set_result((value, fetched_at))
+
+    def _store(self, key: Hashable, value: Any, fetched_at: float) -> None:
+        self._entries[key] = (value, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        # Called with the lock held; at most one refresh per key is in flight
+        if key in self._in_flight:
+            return
+        future = Future()
+        self._in_flight[key] = future
+        self.refreshes += 1
+
+        def log_failure(done: Future) -> None:
+            if done.exception() is not None:
+                logger.warning(f"Background refresh of {key} failed, keeping the stale snapshot: {done.exception()}")
+
+        future.add_done_callback(log_failure)
+        self.executor.submit(self._load, key, loader, future)
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: float, max_stale: float = 0.0) -> Tuple[Any, float]:
+        """Return (value, age_seconds) for key, loading it with loader when no usable snapshot exists."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = self._timer() - fetched_at
+                if age < ttl:
+                    self.fresh_hits += 1
+                    self._entries.move_to_end(key)
+                    return value, age
+                if age < ttl + max_stale:
+                    self.stale_hits += 1
+                    self._refresh_in_background(key, loader)
+                    return value, age
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if owner:
+            self._load(key, loader, future)
+        try:
+            value, fetched_at = future.result()
+        except Exception:
+            if entry is None:
+                raise
+            # An expired snapshot still beats no data at all
+            value, fetched_at = entry
+        return value, self._timer() - fetched_at
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Seed a snapshot fetched elsewhere (e.g. as a side effect of another call)."""
+        with self._lock:
+            self._store(key, value, self._timer())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return fresh/stale hit, blocking miss, coalesced wait and background refresh counters."""
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "non_blocking_rate": (self.fresh_hits + self.stale_hits) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,115 @@
+import logging
+import time
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from utils.tracing import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Stage:
+    """A named unit of work in a Pipeline.
+
+    fn is called with the results of its dependencies as keyword arguments. If it raises or runs
+    longer than timeout seconds, the stage resolves to fallback() (or None) and is marked degraded,
+    and dependents continue with that value.
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (),
+                 timeout: Optional[float] = None, fallback: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def degrade(self) -> Any:
+        return self.fallback() if self.fallback else None
+
+
+class PipelineResult:
+    def __init__(self, results: Dict[str, Any], timings: Dict[str, float], degraded: List[str], total: float):
+        self.results = results
+        self.timings = timings
+        self.degraded = degraded
+        self.total = total
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+
+class Pipeline:
+    """Runs a DAG of stages on an executor, starting each stage as soon as its dependencies resolve."""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages {missing}")
+
+    def run(self, executor: Executor, progress: Optional[Callable[[str], None]] = None) -> PipelineResult:
+        """Execute all stages and return their results, wall-clock timings and degraded stage names."""
+        started_at: Dict[str, float] = {}
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        degraded: List[str] = []
+        running: Dict[Future, str] = {}
+        pending = dict(self.stages)
+        pipeline_start = time.perf_counter()
+
+        def call(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+            started_at[stage.name] = time.perf_counter()
+            with tracer.span(f"stage.{stage.name}"):
+                return stage.fn(**kwargs)
+
+        def resolve(name: str, value: Any, ok: bool) -> None:
+            results[name] = value
+            timings[name] = time.perf_counter() - started_at.get(name, time.perf_counter())
+            if not ok:
+                degraded.append(name)
+            if progress:
+                progress(f"{name} {'done' if ok else 'degraded'} in {timings[name] * 1000:.0f} ms")
+
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    del pending[name]
+                    kwargs = {dep: results[dep] for dep in stage.deps}
+                    running[executor.submit(tracer.propagate(call), stage, kwargs)] = name
+            if not running:
+                raise RuntimeError(f"Pipeline stalled with unresolved stages {list(pending)}")
+
+            # Wake up for the next completion or the nearest stage deadline
+            now = time.perf_counter()
+            timed = [name for name in running.values() if self.stages[name].timeout is not None]
+            deadlines = [started_at[name] + self.stages[name].timeout - now for name in timed if name in started_at]
+            wake = max(min(deadlines), 0.0) if deadlines else None
+            if any(name not in started_at for name in timed):
+                # A timed stage is still queued; poll until it starts so its deadline is known
+                wake = min(wake, 0.05) if wake is not None else 0.05
+            done, _ = wait(list(running), timeout=wake, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                try:
+                    resolve(name, future.result(), True)
+                except Exception as e:
+                    logger.error(f"Stage {name} failed: {str(e)}")
+                    resolve(name, self.stages[name].degrade(), False)
+
+            now = time.perf_counter()
+            for future, name in list(running.items()):
+                stage = self.stages[name]
+                if stage.timeout is not None and name in started_at and now - started_at[name] > stage.timeout:
+                    # The worker thread cannot be interrupted; its eventual result is discarded
+                    future.cancel()
+                    del running[future]
+                    logger.warning(f"Stage {name} timed out after {stage.timeout:g}s, using fallback")
+                    resolve(name, stage.degrade(), False)
+
+        total = time.perf_counter() - pipeline_start
+        timings_ms = {name: round(t * 1000) for name, t in timings.items()}
+        logger.info(f"Pipeline finished in {total * 1000:.0f} ms; stage timings (ms): {timings_ms}"
+                    + (f"; degraded: {degraded}" if degraded else ""))
+        return PipelineResult(results, timings, degraded, total)
@@ -0,0 +1,105 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers block only while no token is available."""
+
+    def __init__(self, rate: float, capacity: float, timer: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = timer()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def per_minute(cls, calls: int, **kwargs) -> "TokenBucket":
+        """Build a bucket allowing `calls` requests per minute with a burst of the same size."""
+        return cls(rate=calls / 60.0, capacity=calls, **kwargs)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting; return False if the bucket is short."""
+        with self._lock:
+            self._refill(self._timer())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take tokens, sleeping only as long as needed for the bucket to refill.
+
+        Returns False if the tokens could not be obtained within timeout seconds.
+        """
+        start = self._timer()
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    now = self._timer()
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        self.acquired += 1
+                        wait = now - start
+                        if queued:
+                            self.waited += 1
+                            self.total_wait += wait
+                            self.max_wait = max(self.max_wait, wait)
+                        return True
+                    if not queued:
+                        queued = True
+                        self._waiting += 1
+                    delay = (tokens - self._tokens) / self.rate
+                if timeout is not None:
+                    remaining = timeout - (self._timer() - start)
+                    if remaining <= 0:
+                        return False
+                    delay = min(delay, remaining)
+                self._sleep(delay)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+
+    def penalize(self) -> None:
+        """Drain the bucket after the upstream reported throttling despite our accounting."""
+        with self._lock:
+            self._refill(self._timer())
+            self._tokens = min(self._tokens, 0.0)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for a token."""
+        with self._lock:
+            return self._waiting
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, available tokens and wait-time metrics."""
+        with self._lock:
+            self._refill(self._timer())
+            return {
+                "queue_depth": self._waiting,
+                "tokens_available": self._tokens,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait_seconds": self.total_wait,
+                "avg_wait_seconds": self.total_wait / self.waited if self.waited else 0.0,
+                "max_wait_seconds": self.max_wait,
+            }
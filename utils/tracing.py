@@ -0,0 +1,241 @@
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace_id", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span_id", default=None)
+# Set by Tracer.trace() so a single request is traced while the tracer is otherwise disabled
+_trace_enabled: contextvars.ContextVar = contextvars.ContextVar("trace_enabled", default=False)
+_ids = itertools.count(1)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+
+    def __enter__(self):
+        self.trace_id = _current_trace.get()
+        if self.trace_id is None:
+            # A span outside any request starts its own trace
+            self._trace_token = _current_trace.set(self.span_id)
+            self.trace_id = self.span_id
+        else:
+            self._trace_token = None
+        self.parent_id = _current_span.get()
+        self._span_token = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        return self
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _current_span.reset(self._span_token)
+        if self._trace_token is not None:
+            _current_trace.reset(self._trace_token)
+        self.tracer._record(self, duration, exc_type is not None)
+        return False
+
+
+class Tracer:
+    """Lightweight in-process tracing: timed spans, counters and size observations.
+
+    Spans nest per request through context variables; use propagate() when handing work to a
+    thread pool so spans in workers attach to the caller's trace. When disabled every call
+    returns immediately, so instrumentation can stay in hot paths; trace() records one request
+    regardless, without turning tracing on for anyone else.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 2000):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._span_stats: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[LabelKey, float] = {}
+        self._sizes: Dict[LabelKey, List[float]] = {}
+
+    @property
+    def active(self) -> bool:
+        """Whether calls in the current context are recorded."""
+        return self.enabled or _trace_enabled.get()
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a block as a span named name."""
+        if not self.active:
+            return _NOOP_SPAN
+        return _Span(self, name, attrs)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator recording each call of the function as a span."""
+        def decorator(fn: Callable) -> Callable:
+            span_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.active:
+                    return fn(*args, **kwargs)
+                with _Span(self, span_name, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a labelled counter, e.g. count("cache_requests_total", cache="symbols", result="hit")."""
+        if not self.active:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_size(self, name: str, nbytes: float, **labels) -> None:
+        """Record a payload size in bytes (kept as count/sum/max)."""
+        if not self.active:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._sizes.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += nbytes
+            stats[2] = max(stats[2], nbytes)
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attrs):
+        """Record the block as a new trace rooted at a span named name, even while disabled.
+
+        Tracing is switched on only for the current context and work propagated from it. Yields
+        the root span; pass its trace_id to trace_spans() to read the trace back.
+        """
+        tokens = (_trace_enabled.set(True), _current_trace.set(None), _current_span.set(None))
+        try:
+            with _Span(self, name, attrs) as span:
+                yield span
+        finally:
+            for var, token in zip((_trace_enabled, _current_trace, _current_span), tokens):
+                var.reset(token)
+
+    @staticmethod
+    def propagate(fn: Callable) -> Callable:
+        """Bind fn to the current trace context so it can run on another thread."""
+        context = contextvars.copy_context()
+        return functools.partial(context.run, fn)
+
+    def _record(self, span: _Span, duration: float, error: bool) -> None:
+        with self._lock:
+            self._spans.append({
+                "trace_id": span.trace_id, "span_id": span.span_id, "parent_id": span.parent_id,
+                "name": span.name, "started_at": span.started_at, "duration_ms": duration * 1000,
+                "error": error, "attrs": span.attrs,
+            })
+            stats = self._span_stats.setdefault(span.name, {"count": 0, "errors": 0, "total_seconds": 0.0,
+                                                            "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._span_stats.clear()
+            self._counters.clear()
+            self._sizes.clear()
+
+    def trace_spans(self, trace_id: int) -> List[Dict[str, Any]]:
+        """Spans of one trace, in start order."""
+        with self._lock:
+            spans = [s for s in self._spans if s["trace_id"] == trace_id]
+        return sorted(spans, key=lambda s: s["started_at"])
+
+    def last_trace(self) -> List[Dict[str, Any]]:
+        """Spans of the most recently finished trace, in start order."""
+        with self._lock:
+            if not self._spans:
+                return []
+            trace_id = self._spans[-1]["trace_id"]
+        return self.trace_spans(trace_id)
+
+    def export_json(self, recent: int = 200) -> str:
+        """Span statistics, counters, payload sizes and the most recent spans as JSON."""
+        with self._lock:
+            data = {
+                "spans": {name: dict(stats, avg_ms=stats["total_seconds"] / stats["count"] * 1000)
+                          for name, stats in self._span_stats.items()},
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self._counters.items()],
+                "payload_bytes": [{"name": name, "labels": dict(labels), "count": s[0], "sum": s[1], "max": s[2]}
+                                  for (name, labels), s in self._sizes.items()],
+                "recent_spans": list(self._spans)[-recent:],
+            }
+        return json.dumps(data, default=str)
+
+    def export_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        def labels_text(labels) -> str:
+            if not labels:
+                return ""
+            escaped = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                       for k, v in labels)
+            return "{" + ",".join(escaped) + "}"
+
+        with self._lock:
+            span_stats = sorted(self._span_stats.items())
+            counters = sorted(self._counters.items())
+            sizes = sorted(self._sizes.items())
+
+        # Each metric family is emitted contiguously under its own TYPE line
+        lines = ["# TYPE span_duration_seconds summary"]
+        for name, stats in span_stats:
+            label = labels_text((("span", name),))
+            lines.append(f"span_duration_seconds_count{label} {stats['count']}")
+            lines.append(f"span_duration_seconds_sum{label} {stats['total_seconds']:.6f}")
+        lines.append("# TYPE span_errors_total counter")
+        for name, stats in span_stats:
+            lines.append(f"span_errors_total{labels_text((('span', name),))} {stats['errors']}")
+        family = None
+        for (name, labels), value in counters:
+            if name != family:
+                lines.append(f"# TYPE {name} counter")
+                family = name
+            lines.append(f"{name}{labels_text(labels)} {value:g}")
+        family = None
+        for (name, labels), (count, total, _) in sizes:
+            if name != family:
+                lines.append(f"# TYPE {name} summary")
+                family = name
+            lines.append(f"{name}_count{labels_text(labels)} {count}")
+            lines.append(f"{name}_sum{labels_text(labels)} {total:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide tracer, enabled with FINANCE_TRACING=1 or by setting tracer.enabled
+tracer = Tracer(enabled=os.getenv("FINANCE_TRACING") == "1")